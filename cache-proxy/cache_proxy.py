@@ -0,0 +1,658 @@
+#!/usr/bin/env python3
+"""
+Read-through caching reverse proxy for the BlueCat API.
+
+Point the module's api_url at the proxy and the proxy at the appliance (or at
+mock-server/server.py). Parallel module runs and drift checks then share the
+answers to repeated lookups such as GET zones, GET records and deploymentRoles:
+
+  - GET responses (200 only) are cached per token scope: the user a session
+    token belongs to, learned from the login response. Unknown tokens get a
+    scope of their own. Each entry lives for --ttl seconds; the least recently
+    used entries are evicted beyond --max-entries or --max-bytes.
+  - POST/PUT/DELETE requests pass through and invalidate the cached reads they
+    can affect, in every scope. Record writes drop the record listings of their
+    zone (or of all zones when the zone cannot be told). Session, deployment and
+    pending-change requests are never cached.
+  - Concurrent misses for the same entry are coalesced into one upstream request.
+  - A request with "Cache-Control: no-cache" skips the cache and refreshes it.
+  - Responses carry X-Cache: HIT, MISS or BYPASS.
+
+Statistics (hit rate overall and per endpoint) are served at GET /_proxy/stats;
+DELETE /_proxy/stats resets them and DELETE /_proxy/cache empties the cache.
+
+Usage: python cache_proxy.py --upstream http://localhost:5001 [--port 5002] [--ttl 30]
+"""
+
+import argparse
+import base64
+import binascii
+import hashlib
+import http.client
+import json
+import re
+import ssl
+import sys
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Reads that are never cached: they change without a write passing through here
+UNCACHED_SEGMENTS = ('sessions', 'login', 'logout', 'deployments', 'pendingChanges', 'health', 'debug', 'admin')
+# Path segments whose reads return records, and writes that change records
+RECORD_SEGMENTS = ('records', 'entities', 'getHostRecordsByHint', 'addHostRecord', 'update', 'delete')
+# Writes that leave every cacheable read unchanged
+NEUTRAL_WRITE_SEGMENTS = ('sessions', 'login', 'logout', 'deploy', 'deployments', 'quickDeploy')
+# Body fields naming a zone or a record
+ZONE_KEYS = ('zoneId', 'parentId')
+RECORD_KEYS = ('id', 'objectId')
+# Request headers that select a different answer from the upstream
+VARY_HEADERS = ('X-Mock-Tenant', 'Accept')
+HOP_BY_HOP = frozenset(('connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te',
+                        'trailer', 'transfer-encoding', 'upgrade', 'content-length'))
+
+_TOKEN_IN_TEXT = re.compile(r'BAMAuthToken:\s*([^\s<]+)')
+
+
+def endpoint_of(method, path):
+    """Group key for statistics: method plus path with ids collapsed"""
+    segments = ['{id}' if s.isdigit() or len(s) == 36 and s.count('-') == 4 else s for s in path.split('/')]
+    return f"{method} {'/'.join(segments)}"
+
+
+def _first(values):
+    return values[0] if values else None
+
+
+def accepted_encodings(header):
+    """Content codings an Accept-Encoding header allows (q > 0), sorted, for cache keys"""
+    codings = set()
+    for item in header.split(','):
+        coding, _, params = item.partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        for param in params.split(';'):
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if quality > 0:
+            codings.add(coding)
+    return tuple(sorted(codings))
+
+
+class ResponseCache:
+    """LRU, TTL-bounded store of upstream responses with tag-based invalidation"""
+
+    def __init__(self, ttl=30.0, max_entries=10000, max_bytes=64 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._by_tag = defaultdict(set)
+        self._bytes = 0
+        # Invalidation counter, and the value it had when each tag was last invalidated
+        self._generation = 0
+        self._tag_generation = {}
+        self._pending = {}
+        # Record id -> zone id, learned from record listings and create responses
+        self._record_zones = OrderedDict()
+        self._reset_counters()
+
+    def reset_stats(self):
+        with self._lock:
+            self._reset_counters()
+
+    def _reset_counters(self):
+        self.started = time.time()
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.bypassed = 0
+        self.writes = 0
+        self.stored = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidated = 0
+        self.endpoints = defaultdict(lambda: {"hits": 0, "misses": 0})
+
+    def get(self, key, endpoint, count=True):
+        """Return a fresh entry (counted as a hit unless count is false) or None"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['expires'] <= now:
+                self._drop(key)
+                self.expired += 1
+                entry = None
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            if count:
+                self.hits += 1
+                self.endpoints[endpoint]['hits'] += 1
+            return entry
+
+    def begin_fetch(self, key, endpoint, count=True):
+        """
+        Register a miss. Returns (True, generation) when the caller should fetch
+        from upstream, or (False, event) when another thread is already fetching it
+        """
+        with self._lock:
+            if count:
+                self.misses += 1
+                self.endpoints[endpoint]['misses'] += 1
+            event = self._pending.get(key)
+            if event is not None:
+                if count:
+                    self.coalesced += 1
+                return False, event
+            self._pending[key] = threading.Event()
+            return True, self._generation
+
+    def end_fetch(self, key, generation, tags, response):
+        """Store a fetched response unless one of its tags was invalidated meanwhile"""
+        with self._lock:
+            event = self._pending.pop(key, None)
+            try:
+                if response is None or response[0] != 200:
+                    return
+                if any(self._tag_generation.get(tag, -1) > generation for tag in tags):
+                    return
+                status, headers, body = response
+                if len(body) > self.max_bytes:
+                    return
+                if key in self._entries:
+                    self._drop(key)
+                self._entries[key] = {"status": status, "headers": headers, "body": body, "tags": tags,
+                                      "stored": time.monotonic(), "expires": time.monotonic() + self.ttl}
+                self._bytes += len(body)
+                for tag in tags:
+                    self._by_tag[tag].add(key)
+                self.stored += 1
+                self._evict()
+            finally:
+                if event is not None:
+                    event.set()
+
+    def bypass(self):
+        with self._lock:
+            self.bypassed += 1
+
+    def invalidate(self, tags, write=True):
+        """Drop every entry carrying one of the tags, in all scopes"""
+        with self._lock:
+            if write:
+                self.writes += 1
+            self._generation += 1
+            for tag in tags:
+                self._tag_generation[tag] = self._generation
+                for key in list(self._by_tag.pop(tag, ())):
+                    if key in self._entries:
+                        self._drop(key)
+                        self.invalidated += 1
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            for key in list(self._entries):
+                self._drop(key)
+
+    def learn_record_zones(self, pairs):
+        """Remember which zone records belong to, so their writes invalidate narrowly"""
+        with self._lock:
+            for record_id, zone_id in pairs:
+                self._record_zones[str(record_id)] = str(zone_id)
+                self._record_zones.move_to_end(str(record_id))
+            while len(self._record_zones) > self.max_entries * 10:
+                self._record_zones.popitem(last=False)
+
+    def zone_of_record(self, record_id):
+        with self._lock:
+            return self._record_zones.get(str(record_id))
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        self._bytes -= len(entry['body'])
+        for tag in entry['tags']:
+            keys = self._by_tag.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._by_tag[tag]
+
+    def _evict(self):
+        while self._entries and (len(self._entries) > self.max_entries or self._bytes > self.max_bytes):
+            self._drop(next(iter(self._entries)))
+            self.evictions += 1
+
+    def status(self):
+        """Return the hit rate and counters, overall and per endpoint"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "uptime_s": round(time.time() - self.started, 1),
+                "ttl_s": self.ttl,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "coalesced": self.coalesced,
+                "bypassed": self.bypassed,
+                "writes": self.writes,
+                "stored": self.stored,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "invalidated": self.invalidated,
+                "endpoints": {
+                    name: dict(counts, hit_rate=round(counts['hits'] / (counts['hits'] + counts['misses']), 4))
+                    for name, counts in sorted(self.endpoints.items())
+                }
+            }
+
+
+class Upstream:
+    """Keep-alive connections to the upstream API, one per proxy thread"""
+
+    def __init__(self, base_url, timeout=60.0, insecure=False):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ('http', 'https'):
+            raise ValueError(f"unsupported upstream URL: {base_url}")
+        self.scheme = parts.scheme
+        self.netloc = parts.netloc
+        self.prefix = parts.path.rstrip('/')
+        self.timeout = timeout
+        self.context = None
+        if insecure:
+            self.context = ssl.create_default_context()
+            self.context.check_hostname = False
+            self.context.verify_mode = ssl.CERT_NONE
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            if self.scheme == 'https':
+                conn = http.client.HTTPSConnection(self.netloc, timeout=self.timeout, context=self.context)
+            else:
+                conn = http.client.HTTPConnection(self.netloc, timeout=self.timeout)
+            self._local.conn = conn
+            self._local.used = False
+        return conn
+
+    def _close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+        self._local.conn = None
+
+    def request(self, method, target, headers, body):
+        """Send a request; returns (status, [(header, value)], body bytes)"""
+        for attempt in (1, 2):
+            conn = self._connection()
+            reused = self._local.used
+            try:
+                conn.request(method, self.prefix + target, body=body, headers=headers)
+                response = conn.getresponse()
+                data = response.read()
+            except (http.client.RemoteDisconnected, BrokenPipeError, ConnectionResetError):
+                self._close()
+                # The upstream closed an idle keep-alive connection; the request never reached it
+                if reused and attempt == 1:
+                    continue
+                raise
+            except Exception:
+                self._close()
+                raise
+            self._local.used = True
+            if response.will_close:
+                self._close()
+            return response.status, response.getheaders(), data
+
+
+class ProxyHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'BlueCatCacheProxy/1.0'
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def do_GET(self):
+        self.handle_request()
+
+    def do_POST(self):
+        self.handle_request()
+
+    def do_PUT(self):
+        self.handle_request()
+
+    def do_DELETE(self):
+        self.handle_request()
+
+    def do_PATCH(self):
+        self.handle_request()
+
+    # --- Request handling ---
+
+    def handle_request(self):
+        if self.headers.get('Transfer-Encoding', '').lower() == 'chunked':
+            self.send_reply(411, [], b'{"error": "Content-Length required"}')
+            return
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else None
+
+        parts = urlsplit(self.path)
+        path = parts.path
+        query = parse_qs(parts.query)
+        segments = [s for s in path.split('/') if s]
+
+        if path.startswith('/_proxy/'):
+            self.handle_admin(path)
+            return
+
+        cache = self.server.cache
+        if self.command == 'GET' and not any(s in UNCACHED_SEGMENTS for s in segments):
+            self.handle_cached_read(path, query, segments)
+            return
+
+        if self.command != 'GET':
+            tags = self.write_tags(segments, query, body)
+            if tags:
+                cache.invalidate(tags)
+        else:
+            cache.bypass()
+        self.forget_session(segments)
+
+        response = self.forward(body)
+        if response is None:
+            return
+        status, headers, data = response
+        if self.command != 'GET' and tags:
+            # Reads that started before the write finished must not be cached
+            cache.invalidate(tags, write=False)
+        self.learn_session(segments, query, status, data)
+        self.learn_records(segments, status, data)
+        self.send_reply(status, headers, data, 'BYPASS')
+
+    def handle_cached_read(self, path, query, segments):
+        cache = self.server.cache
+        endpoint = endpoint_of('GET', path)
+        key = (self.scope(),) + tuple(self.headers.get(h, '') for h in VARY_HEADERS) + (
+            accepted_encodings(self.headers.get('Accept-Encoding', '')), self.path)
+        refresh = 'no-cache' in self.headers.get('Cache-Control', '')
+
+        if not refresh:
+            entry = cache.get(key, endpoint)
+            if entry is not None:
+                self.send_entry(entry)
+                return
+
+        tags = self.read_tags(segments, query)
+        first = True
+        while True:
+            fetch, token = cache.begin_fetch(key, endpoint, count=first)
+            if fetch:
+                break
+            first = False
+            token.wait(self.server.upstream.timeout)
+            entry = cache.get(key, endpoint, count=False)
+            if entry is not None:
+                self.send_entry(entry)
+                return
+
+        response = None
+        try:
+            response = self.forward(None)
+        finally:
+            cache.end_fetch(key, token, tags, response)
+        if response is None:
+            return
+        status, headers, data = response
+        self.learn_records(segments, status, data)
+        self.send_reply(status, headers, data, 'MISS')
+
+    def handle_admin(self, path):
+        cache = self.server.cache
+        if path == '/_proxy/stats' and self.command == 'GET':
+            status = cache.status()
+        elif path == '/_proxy/stats' and self.command == 'DELETE':
+            cache.reset_stats()
+            status = cache.status()
+        elif path == '/_proxy/cache' and self.command == 'DELETE':
+            cache.clear()
+            status = cache.status()
+        else:
+            self.send_reply(404, [], b'{"error": "Unknown proxy endpoint"}')
+            return
+        self.send_reply(200, [('Content-Type', 'application/json')], json.dumps(status, indent=2).encode())
+
+    def forward(self, body):
+        """Send the request upstream; answers 502 itself and returns None on failure"""
+        headers = {k: v for k, v in self.headers.items() if k.lower() not in HOP_BY_HOP and k.lower() != 'host'}
+        if body is not None:
+            headers['Content-Length'] = str(len(body))
+        try:
+            return self.server.upstream.request(self.command, self.path, headers, body)
+        except (OSError, http.client.HTTPException) as e:
+            self.send_reply(502, [('Content-Type', 'application/json')],
+                            json.dumps({"error": f"Upstream request failed: {e}"}).encode())
+            return None
+
+    def send_entry(self, entry):
+        """Answer from a cache entry, with its Age"""
+        age = int(time.monotonic() - entry['stored'])
+        self.send_reply(entry['status'], entry['headers'] + [('Age', str(age))], entry['body'], 'HIT')
+
+    def send_reply(self, status, headers, body, cache_state=None):
+        self.send_response(status)
+        for name, value in headers:
+            if name.lower() not in HOP_BY_HOP and name.lower() not in ('date', 'server'):
+                self.send_header(name, value)
+        if cache_state:
+            self.send_header('X-Cache', cache_state)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    # --- Scopes and tags ---
+
+    def scope(self):
+        """The user a request's token belongs to, or the token itself when unknown"""
+        scheme, token = self.auth_token()
+        if not token:
+            return 'anonymous'
+        if scheme == 'Basic':
+            # The upstream checks the password on every request; cached answers must not skip that
+            return 'basic:' + hashlib.sha256(token.encode()).hexdigest()
+        user = self.server.sessions.get(token)
+        return 'user:' + user if user else 'token:' + token
+
+    def auth_token(self):
+        """(scheme, credentials) of the Authorization header"""
+        scheme, _, credentials = self.headers.get('Authorization', '').partition(' ')
+        return scheme.rstrip(':'), credentials.strip()
+
+    def forget_session(self, segments):
+        """Stop serving a logged-out token from its user's cache"""
+        if len(segments) >= 2 and segments[-2] == 'sessions' and self.command == 'DELETE':
+            self.server.sessions.discard(segments[-1])
+        elif segments and segments[-1] == 'logout':
+            self.server.sessions.discard(self.auth_token()[1])
+
+    def read_tags(self, segments, query):
+        """Tags of a cacheable read: which writes make it stale"""
+        if not any(s in RECORD_SEGMENTS for s in segments):
+            return ('static',)
+        zone_id = _first(query.get('zone')) or _first(query.get('parentId'))
+        if zone_id is None and 'zones' in segments:
+            index = segments.index('zones') + 1
+            zone_id = segments[index] if index < len(segments) and segments[index].isdigit() else None
+        if zone_id is not None:
+            return ('records', 'zone:' + zone_id)
+        return ('records', 'records:any')
+
+    def write_tags(self, segments, query, body):
+        """Tags a write invalidates, or () when it cannot change a cached read"""
+        if segments and segments[-1] in NEUTRAL_WRITE_SEGMENTS or (
+                len(segments) >= 2 and segments[-2] in ('sessions', 'deployments')):
+            return ()
+        if not any(s in RECORD_SEGMENTS for s in segments):
+            # Unknown write: anything may have changed
+            return ('records', 'static')
+
+        data = {}
+        if body:
+            try:
+                data = json.loads(body)
+            except ValueError:
+                data = {}
+        if not isinstance(data, dict):
+            data = {}
+
+        zone_id = next((str(data[k]) for k in ZONE_KEYS if data.get(k) is not None), None)
+        if zone_id is None and 'zones' in segments:
+            index = segments.index('zones') + 1
+            if index < len(segments) and segments[index].isdigit():
+                zone_id = segments[index]
+        if zone_id is None:
+            record_id = next((str(data[k]) for k in RECORD_KEYS if data.get(k) is not None), None)
+            record_id = record_id or _first(query.get('objectId'))
+            if record_id is None and segments[-1].isdigit():
+                record_id = segments[-1]
+            if record_id is not None:
+                zone_id = self.server.cache.zone_of_record(record_id)
+
+        if zone_id is not None:
+            return ('zone:' + zone_id, 'records:any')
+        return ('records',)
+
+    def learn_session(self, segments, query, status, data):
+        """Map a new session token to its user from a login response"""
+        if status != 200 or not segments or segments[-1] not in ('sessions', 'login'):
+            return
+        text = data.decode('utf-8', 'replace')
+        token = user = None
+        try:
+            payload = json.loads(text)
+            if isinstance(payload, dict):
+                token = payload.get('token') or payload.get('apiToken')
+                user = payload.get('username')
+        except ValueError:
+            match = _TOKEN_IN_TEXT.search(text)
+            token = match.group(1) if match else None
+        if not token:
+            return
+        if not user:
+            auth = self.headers.get('Authorization', '')
+            if auth.startswith('Basic '):
+                try:
+                    user = base64.b64decode(auth[6:]).decode('utf-8').split(':', 1)[0]
+                except (binascii.Error, UnicodeDecodeError):
+                    user = None
+            user = user or _first(query.get('username'))
+        if user:
+            self.server.sessions.add(token, user)
+
+    def learn_records(self, segments, status, data):
+        """Remember record -> zone from record listings and create responses"""
+        if status not in (200, 201) or not any(s in RECORD_SEGMENTS for s in segments):
+            return
+        try:
+            payload = json.loads(data)
+        except ValueError:
+            return
+        if isinstance(payload, dict):
+            payload = payload.get('data', [payload])
+        if not isinstance(payload, list):
+            return
+        zone_hint = None
+        if 'zones' in segments:
+            index = segments.index('zones') + 1
+            zone_hint = segments[index] if index < len(segments) else None
+        pairs = []
+        for item in payload:
+            if isinstance(item, dict) and item.get('id') is not None:
+                zone_id = next((item[k] for k in ZONE_KEYS if item.get(k) is not None), zone_hint)
+                if zone_id is not None:
+                    pairs.append((item['id'], zone_id))
+        if pairs:
+            self.server.cache.learn_record_zones(pairs)
+
+
+class SessionMap:
+    """Bounded token -> user map"""
+
+    def __init__(self, max_sessions=10000):
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        self._users = OrderedDict()
+
+    def add(self, token, user):
+        with self._lock:
+            self._users[token] = user
+            while len(self._users) > self.max_sessions:
+                self._users.popitem(last=False)
+
+    def get(self, token):
+        with self._lock:
+            return self._users.get(token)
+
+    def discard(self, token):
+        with self._lock:
+            self._users.pop(token, None)
+
+
+class CacheProxy(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+    def __init__(self, address, upstream, cache, verbose=False):
+        super().__init__(address, ProxyHandler)
+        self.upstream = upstream
+        self.cache = cache
+        self.sessions = SessionMap()
+        self.verbose = verbose
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Caching reverse proxy for the BlueCat API")
+    parser.add_argument('--upstream', required=True, help="BlueCat (or mock server) base URL")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on")
+    parser.add_argument('--port', type=int, default=5002, help="port to listen on")
+    parser.add_argument('--ttl', type=float, default=30.0, help="seconds a cached response stays fresh")
+    parser.add_argument('--max-entries', type=int, default=10000, help="most cached responses")
+    parser.add_argument('--max-bytes', type=int, default=64 * 1024 * 1024, help="most cached response bytes")
+    parser.add_argument('--timeout', type=float, default=60.0, help="upstream request timeout in seconds")
+    parser.add_argument('--insecure', action='store_true', help="skip TLS certificate checks for the upstream")
+    parser.add_argument('--verbose', action='store_true', help="log every request")
+    args = parser.parse_args()
+
+    try:
+        upstream = Upstream(args.upstream, args.timeout, args.insecure)
+    except ValueError as e:
+        sys.exit(str(e))
+    cache = ResponseCache(args.ttl, args.max_entries, args.max_bytes)
+    server = CacheProxy((args.host, args.port), upstream, cache, args.verbose)
+
+    print(f"Caching proxy for {args.upstream} on http://{args.host}:{args.port} (ttl {args.ttl:g}s)")
+    print("Statistics: GET /_proxy/stats   Reset: DELETE /_proxy/stats   Flush: DELETE /_proxy/cache")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -64,9 +64,9 @@ module "dns_record_custom" {
   record_value = "steus2ccanon123.privatelink.queue.core.windows.net"
   ttl          = 300
 }
-*/
 
 ## Example 4: Testing with Mock Server
+## (test-module.sh tests the mock through test-local.tf, in a tenant of its own)
 module "dns_record_test" {
   source = "../terraform-bluecat"
 
@@ -85,3 +85,4 @@ module "dns_record_test" {
   record_value = "steus2ccanon123.privatelink.queue.core.windows.net"
   ttl          = 300
 }
+*/
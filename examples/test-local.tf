@@ -8,7 +8,7 @@ terraform {
 module "test_cname_record" {
   source = "../terraform-bluecat"
 
-  api_url      = "http://localhost:5001"
+  api_url      = var.api_url
   username     = "testuser"
   password     = "testpass"
   zone         = "queue.core.windows.net"
@@ -22,7 +22,7 @@ module "test_cname_record" {
 module "test_a_record" {
   source = "../terraform-bluecat"
 
-  api_url      = "http://localhost:5001"
+  api_url      = var.api_url
   username     = "testuser"
   password     = "testpass"
   zone         = "privatelink.queue.core.windows.net"
@@ -36,7 +36,7 @@ module "test_a_record" {
 module "test_txt_record" {
   source = "../terraform-bluecat"
 
-  api_url      = "http://localhost:5001"
+  api_url      = var.api_url
   username     = "testuser"
   password     = "testpass"
   zone         = "example.com"
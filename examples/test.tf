@@ -3,7 +3,7 @@ module "test_cname" {
   source = "../terraform-bluecat"
 
   # Connection settings
-  api_url  = "http://localhost:5001"
+  api_url  = var.api_url
   username = "testuser"
   password = "testpass"
 
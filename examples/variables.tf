@@ -0,0 +1,5 @@
+variable "api_url" {
+  description = "BlueCat API URL (the mock server, optionally with a /tenants/<name> prefix)"
+  type        = string
+  default     = "http://localhost:5001"
+}
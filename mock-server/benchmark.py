@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Response throughput benchmark for the mock BlueCat API server.
+Fills one zone with synthetic records and measures how many large list
+responses per second the hot endpoints can produce through Flask's test client.
+
+Usage: python benchmark.py [--records N] [--iterations N]
+"""
+
+import argparse
+import time
+
+import server
+
+
+def seed(zone_id, zone_name, count):
+    """Fill a zone with synthetic A records directly in the in-memory store"""
+    created = "2024-01-01T00:00:00"
+    tenant = server.current_tenant()
+    for i in range(count):
+        tenant.records[tenant.next_record_id()] = {
+            "name": f"host-{i:06d}",
+            "type": "A",
+            "rdata": f"10.{(i >> 16) & 255}.{(i >> 8) & 255}.{i & 255}",
+            "ttl": 3600,
+            "zone": zone_name,
+            "parentId": zone_id,
+            "created": created
+        }
+
+
+def login(client):
+    """Return an auth header for the test client"""
+    response = client.post('/api/v2/sessions', json={"username": "bench", "password": "bench"})
+    return {"Authorization": f"Bearer {response.get_json()['token']}"}
+
+
+def measure(client, path, headers, iterations):
+    """Return (requests per second, response size in bytes) for a GET endpoint"""
+    size = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        response = client.get(path, headers=headers)
+        size = len(response.get_data())
+    elapsed = time.perf_counter() - start
+    return iterations / elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark large mock server responses")
+    parser.add_argument('--records', type=int, default=20000, help="records to seed into the zone")
+    parser.add_argument('--iterations', type=int, default=20, help="requests per endpoint")
+    args = parser.parse_args()
+
+    zone_id = server.zones['example.com']['id']
+    seed(zone_id, 'example.com', args.records)
+
+    # Match the __main__ entry point, which runs the app in debug mode
+    server.app.debug = True
+    client = server.app.test_client()
+    auth = login(client)
+    endpoints = [
+        f"/api/v2/records?zone={zone_id}",
+        f"/api/v2/zones/{zone_id}/entities",
+        "/debug/records"
+    ]
+
+    print(f"{args.records} records, {args.iterations} requests per endpoint")
+    for path in endpoints:
+        for encoding in ('identity', 'gzip'):
+            headers = dict(auth, **{"Accept-Encoding": encoding})
+            rps, size = measure(client, path, headers, args.iterations)
+            print(f"  {path:<40} {encoding:<8} {rps:8.1f} req/s {size / 1024:10.1f} KiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Synthetic DNS dataset generator for scale testing the mock BlueCat API server.
+
+The same parameters and seed always produce the same zones and records, so scale
+runs are reproducible. Zones are spread round-robin across views; records mix
+A/AAAA/CNAME/TXT types with host-style names drawn from a skewed distribution
+(a few common prefixes dominate, like real estates).
+
+Used by server.py (--seed-zones/--seed-records) to bulk-load data at startup, or
+standalone to dump the dataset as JSON lines:
+
+    python dataset.py --zones 10 --records 1000 > dataset.jsonl
+"""
+
+import argparse
+import json
+import random
+import sys
+from itertools import accumulate
+
+DEFAULT_VIEWS = ('internal', 'external', 'default')
+
+# (type, weight) - roughly the mix seen in enterprise zones
+RECORD_TYPES = (('A', 55), ('AAAA', 15), ('CNAME', 20), ('TXT', 10))
+
+# Host name prefixes, most common first; picked with Zipf-like weights
+NAME_PREFIXES = (
+    'web', 'app', 'api', 'db', 'vm', 'host', 'srv', 'k8s-node', 'mail', 'vpn',
+    'cache', 'queue', 'stor', 'lb', 'proxy', 'auth', 'git', 'ci', 'monitor', 'log'
+)
+NAME_ENVIRONMENTS = ('', '', '', 'dev-', 'test-', 'prod-', 'stg-')
+
+ZONE_LABELS = (
+    'corp', 'apps', 'infra', 'svc', 'prod', 'dev', 'lab', 'data', 'edge', 'mgmt'
+)
+ZONE_DOMAINS = (
+    'example.com', 'example.net', 'example.org',
+    'privatelink.queue.core.windows.net', 'privatelink.blob.core.windows.net',
+    'internal.example.com'
+)
+
+TXT_TEMPLATES = (
+    'v=spf1 include:_spf.example.com ~all',
+    'site-verification={token}',
+    'owner={token}'
+)
+
+
+class Dataset:
+    """Deterministic set of zones and records for bulk loading"""
+
+    def __init__(self, zone_count, records_per_zone, views=DEFAULT_VIEWS, seed=42,
+                 first_zone_id=300001):
+        if not views:
+            raise ValueError("at least one view is required")
+        self.zone_count = zone_count
+        self.records_per_zone = records_per_zone
+        self.views = tuple(views)
+        self.seed = seed
+        self.zones = self._build_zones(first_zone_id)
+
+    def _build_zones(self, first_zone_id):
+        """Return zone dicts in the same shape as server.zones values"""
+        zone_list = []
+        for i in range(self.zone_count):
+            label = ZONE_LABELS[i % len(ZONE_LABELS)]
+            domain = ZONE_DOMAINS[(i // len(ZONE_LABELS)) % len(ZONE_DOMAINS)]
+            name = f"{label}{i:05d}.{domain}"
+            zone_list.append({
+                "id": first_zone_id + i,
+                "name": name,
+                "view": self.views[i % len(self.views)]
+            })
+        return zone_list
+
+    def records(self, created=None):
+        """Yield record dicts in the same shape as server.records values"""
+        created = created or "2024-01-01T00:00:00"
+        rng = random.Random(self.seed)
+
+        type_names = [t for t, _ in RECORD_TYPES]
+        type_weights = list(accumulate(w for _, w in RECORD_TYPES))
+        prefix_weights = list(accumulate(1.0 / (rank + 1) for rank in range(len(NAME_PREFIXES))))
+        choices = rng.choices
+
+        for zone in self.zones:
+            zone_name = zone['name']
+            zone_id = zone['id']
+            counters = {}
+            last_host = None
+
+            types = choices(type_names, cum_weights=type_weights, k=self.records_per_zone)
+            prefixes = choices(NAME_PREFIXES, cum_weights=prefix_weights, k=self.records_per_zone)
+            environments = choices(NAME_ENVIRONMENTS, k=self.records_per_zone)
+
+            for record_type, prefix, environment in zip(types, prefixes, environments):
+                stem = environment + prefix
+                number = counters.get(stem, 0) + 1
+                counters[stem] = number
+                name = f"{stem}{number:03d}"
+
+                if record_type == 'A':
+                    value = rng.getrandbits(24)
+                    rdata = f"10.{value >> 16}.{(value >> 8) & 255}.{value & 255}"
+                elif record_type == 'AAAA':
+                    rdata = f"fd00:{zone_id & 0xffff:x}::{rng.getrandbits(32):x}"
+                elif record_type == 'CNAME':
+                    rdata = f"{last_host or prefix}.{zone_name}"
+                else:
+                    template = TXT_TEMPLATES[rng.randrange(len(TXT_TEMPLATES))]
+                    rdata = template.format(token=f"{rng.getrandbits(64):016x}")
+
+                if record_type in ('A', 'AAAA'):
+                    last_host = name
+
+                yield {
+                    "name": name,
+                    "type": record_type,
+                    "rdata": rdata,
+                    "ttl": 3600,
+                    "zone": zone_name,
+                    "parentId": zone_id,
+                    "created": created
+                }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate a synthetic DNS dataset as JSON lines")
+    parser.add_argument('--zones', type=int, default=10, help="number of zones")
+    parser.add_argument('--records', type=int, default=100, help="records per zone")
+    parser.add_argument('--views', default=','.join(DEFAULT_VIEWS), help="comma-separated view names")
+    parser.add_argument('--seed', type=int, default=42, help="random seed")
+    args = parser.parse_args()
+
+    dataset = Dataset(args.zones, args.records, views=args.views.split(','), seed=args.seed)
+    out = sys.stdout
+    for zone in dataset.zones:
+        out.write(json.dumps({"zone": zone}) + "\n")
+    for record in dataset.records():
+        out.write(json.dumps({"record": record}) + "\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,101 @@
+"""
+Idempotency-Key support for the mock BlueCat API server.
+
+A create request carrying an Idempotency-Key is run once; repeats with the same
+key (from the same user) get the stored response back instead of creating a
+second object. The cache is bounded (oldest keys are evicted first) and entries
+expire, so it stays small however many keys clients send.
+
+  - same key, same request while the first is still running -> 409, retry later
+  - same key, different method/path/body                     -> 422
+  - the created record is deleted                             -> key is forgotten,
+                                                                 so re-creating works
+Only successful (2xx) responses are stored; a failed request releases its key.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+NEW = 'new'
+REPLAY = 'replay'
+MISMATCH = 'mismatch'
+IN_PROGRESS = 'in_progress'
+
+
+class IdempotencyCache:
+    """Bounded, expiring store of responses keyed by (user, Idempotency-Key)"""
+
+    # Shared limits, set from the server's command line
+    max_keys = 10000
+    ttl = 3600.0
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._keys_by_record = {}
+        self.replayed = 0
+        self.mismatched = 0
+        self.conflicts = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def begin(self, key, fingerprint):
+        """Claim a key for a request; returns (state, stored entry or None)"""
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(key)
+            if entry is None:
+                self._entries[key] = {"fingerprint": fingerprint, "expires": now + self.ttl,
+                                      "response": None, "record_id": None}
+                self._evict()
+                return NEW, None
+            if entry['fingerprint'] != fingerprint:
+                self.mismatched += 1
+                return MISMATCH, entry
+            if entry['response'] is None:
+                self.conflicts += 1
+                return IN_PROGRESS, entry
+            self.replayed += 1
+            return REPLAY, entry
+
+    def complete(self, key, status, body, mimetype, record_id=None):
+        """Store the response of a successful request"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return
+            entry['response'] = (status, body, mimetype)
+            entry['record_id'] = record_id
+            if record_id is not None:
+                self._keys_by_record[record_id] = key
+
+    def release(self, key):
+        """Forget a key whose request failed, so it can be retried"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry['response'] is None:
+                del self._entries[key]
+
+    def forget_record(self, record_id):
+        """Drop the key that created a record, once that record is deleted"""
+        with self._lock:
+            key = self._keys_by_record.pop(record_id, None)
+            if key is not None:
+                self._entries.pop(key, None)
+
+    def _drop_oldest(self):
+        key, entry = self._entries.popitem(last=False)
+        if entry['record_id'] is not None and self._keys_by_record.get(entry['record_id']) == key:
+            del self._keys_by_record[entry['record_id']]
+
+    def _expire(self, now):
+        # Every entry gets the same TTL, so insertion order is expiry order
+        while self._entries and next(iter(self._entries.values()))['expires'] <= now:
+            self._drop_oldest()
+
+    def _evict(self):
+        while len(self._entries) > self.max_keys:
+            self._drop_oldest()
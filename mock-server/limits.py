@@ -0,0 +1,100 @@
+"""
+Overload simulation for the mock BlueCat API server.
+
+Lets the mock behave like an appliance under pressure so client-side throttling
+(terraform-bluecat/governor.sh) can be validated:
+
+  max_inflight  - API requests beyond this many concurrent ones get 503
+  rate          - requests per second allowed by a token bucket; excess gets 429
+  max_sessions  - logins beyond this many active sessions get 429
+
+Rejected responses carry Retry-After. All limits are off (0) by default. The
+peak concurrency and rejection counters show how well a client kept within them.
+"""
+
+import math
+import threading
+import time
+
+
+class LoadLimiter:
+    """Admission control for API requests with counters for the admin API"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.configure()
+
+    def configure(self, max_inflight=0, rate=0.0, burst=None, max_sessions=0):
+        """Set the limits (0 disables one) and reset the counters"""
+        with self._lock:
+            self.max_inflight = max(int(max_inflight), 0)
+            self.rate = max(float(rate), 0.0)
+            self.burst = max(float(burst), 1.0) if burst else max(self.rate, 1.0)
+            self.max_sessions = max(int(max_sessions), 0)
+            self._tokens = self.burst
+            self._refilled = time.monotonic()
+            self._reset_counters()
+
+    def reset_stats(self):
+        with self._lock:
+            self._reset_counters()
+
+    def _reset_counters(self):
+        self.inflight = 0
+        self.peak_inflight = 0
+        self.admitted = 0
+        self.rejected_rate = 0
+        self.rejected_inflight = 0
+        self.rejected_sessions = 0
+
+    def enter(self):
+        """Admit a request; returns None, or (status, retry_after_seconds, message)"""
+        with self._lock:
+            if self.rate:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+                self._refilled = now
+                if self._tokens < 1.0:
+                    self.rejected_rate += 1
+                    wait = math.ceil((1.0 - self._tokens) / self.rate)
+                    return 429, max(wait, 1), "Rate limit exceeded"
+
+            if self.max_inflight and self.inflight >= self.max_inflight:
+                self.rejected_inflight += 1
+                return 503, 1, "Server busy: too many concurrent requests"
+
+            if self.rate:
+                self._tokens -= 1.0
+            self.inflight += 1
+            self.peak_inflight = max(self.peak_inflight, self.inflight)
+            self.admitted += 1
+            return None
+
+    def leave(self):
+        """Finish a request admitted by enter()"""
+        with self._lock:
+            self.inflight -= 1
+
+    def session_allowed(self, active_sessions):
+        """Whether another session may be opened"""
+        if not self.max_sessions or active_sessions < self.max_sessions:
+            return True
+        with self._lock:
+            self.rejected_sessions += 1
+        return False
+
+    def status(self):
+        """Return the limits and counters"""
+        with self._lock:
+            return {
+                "max_inflight": self.max_inflight,
+                "rate": self.rate,
+                "burst": self.burst,
+                "max_sessions": self.max_sessions,
+                "inflight": self.inflight,
+                "peak_inflight": self.peak_inflight,
+                "admitted": self.admitted,
+                "rejected_rate": self.rejected_rate,
+                "rejected_inflight": self.rejected_inflight,
+                "rejected_sessions": self.rejected_sessions
+            }
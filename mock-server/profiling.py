@@ -0,0 +1,187 @@
+"""
+On-demand request profiling for the mock BlueCat API server.
+
+Profiling is switched on at runtime through the /admin/profiling endpoints and is
+limited to requests whose path matches a route pattern. Two modes are supported:
+
+  deterministic - wraps each matching request in cProfile and merges the results
+                  into one pstats dump (downloadable, open with pstats/snakeviz)
+  sampling      - a background thread samples the stacks of in-flight matching
+                  requests and aggregates them as collapsed stacks
+                  (flamegraph.pl / speedscope input format)
+
+When profiling is off the per-request cost is a single attribute check.
+"""
+
+import cProfile
+import marshal
+import os
+import pstats
+import re
+import sys
+import threading
+from collections import Counter
+
+MODES = ('deterministic', 'sampling')
+
+
+class RequestProfiler:
+    """Collects aggregated profiles for requests matching a route pattern"""
+
+    def __init__(self):
+        self.enabled = False
+        self.mode = None
+        self.route = None
+        self.interval = 0.005
+        self._pattern = None
+        self._lock = threading.Lock()
+        # cProfile can only be active for one request at a time, so concurrent
+        # matching requests are skipped rather than queued behind each other
+        self._cprofile_busy = threading.Lock()
+        self._stats = None
+        self._stacks = Counter()
+        self._active_threads = set()
+        self._sampler = None
+        self._stop_sampler = threading.Event()
+        self.profiled_requests = 0
+        self.skipped_requests = 0
+        self.samples = 0
+
+    def start(self, mode='deterministic', route='.*', interval_ms=5):
+        """Enable profiling, discarding any previously collected data"""
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of: {', '.join(MODES)}")
+        pattern = re.compile(route)
+
+        self.stop()
+        with self._lock:
+            self.mode = mode
+            self.route = route
+            self.interval = max(float(interval_ms), 0.1) / 1000.0
+            self._pattern = pattern
+            self._stats = None
+            self._stacks = Counter()
+            self.profiled_requests = 0
+            self.skipped_requests = 0
+            self.samples = 0
+
+        if mode == 'sampling':
+            self._stop_sampler.clear()
+            self._sampler = threading.Thread(target=self._sample_loop, daemon=True)
+            self._sampler.start()
+        self.enabled = True
+
+    def stop(self):
+        """Disable profiling, keeping collected data available for download"""
+        self.enabled = False
+        if self._sampler is not None:
+            self._stop_sampler.set()
+            self._sampler.join()
+            self._sampler = None
+
+    def status(self):
+        """Return the current configuration and counters"""
+        return {
+            "enabled": self.enabled,
+            "mode": self.mode,
+            "route": self.route,
+            "interval_ms": self.interval * 1000.0,
+            "profiled_requests": self.profiled_requests,
+            "skipped_requests": self.skipped_requests,
+            "samples": self.samples,
+            "has_pstats": self._stats is not None,
+            "has_stacks": bool(self._stacks)
+        }
+
+    def begin_request(self, path):
+        """Start profiling the current request if it matches; returns a handle or None"""
+        if not self.enabled or not self._pattern.search(path):
+            return None
+
+        if self.mode == 'sampling':
+            ident = threading.get_ident()
+            with self._lock:
+                self._active_threads.add(ident)
+                self.profiled_requests += 1
+            return ('sampling', ident)
+
+        if not self._cprofile_busy.acquire(blocking=False):
+            with self._lock:
+                self.skipped_requests += 1
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) already owns the interpreter hook
+            self._cprofile_busy.release()
+            with self._lock:
+                self.skipped_requests += 1
+            return None
+        return ('deterministic', profile)
+
+    def end_request(self, handle):
+        """Stop profiling a request started with begin_request"""
+        if handle is None:
+            return
+        kind, value = handle
+
+        if kind == 'sampling':
+            with self._lock:
+                self._active_threads.discard(value)
+            return
+
+        value.disable()
+        self._cprofile_busy.release()
+        with self._lock:
+            if self._stats is None:
+                self._stats = pstats.Stats(value)
+            else:
+                self._stats.add(value)
+            self.profiled_requests += 1
+
+    def pstats_bytes(self):
+        """Return the merged deterministic profile in pstats dump format"""
+        with self._lock:
+            if self._stats is None:
+                return None
+            return marshal.dumps(self._stats.stats)
+
+    def collapsed_stacks(self):
+        """Return sampled stacks in collapsed ("frame;frame;frame count") format"""
+        with self._lock:
+            if not self._stacks:
+                return None
+            lines = [f"{stack} {count}" for stack, count in self._stacks.most_common()]
+        return "\n".join(lines) + "\n"
+
+    def _sample_loop(self):
+        """Periodically record the stacks of threads serving matching requests"""
+        while not self._stop_sampler.wait(self.interval):
+            with self._lock:
+                active = list(self._active_threads)
+            if not active:
+                continue
+
+            frames = sys._current_frames()
+            collected = []
+            for ident in active:
+                frame = frames.get(ident)
+                if frame is not None:
+                    collected.append(_collapse(frame))
+
+            with self._lock:
+                for stack in collected:
+                    self._stacks[stack] += 1
+                self.samples += len(collected)
+
+
+def _collapse(frame):
+    """Render a frame chain root-first as a semicolon separated stack"""
+    names = []
+    while frame is not None:
+        code = frame.f_code
+        names.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    names.reverse()
+    return ";".join(names)
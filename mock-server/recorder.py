@@ -0,0 +1,228 @@
+"""
+Traffic recorder for the mock BlueCat API server.
+
+Recording is switched on with --record or the /admin/recording endpoints and
+appends one compact JSON line per matching request: start offset, duration,
+method, path, query, body and status. Entries are redacted before they are
+written:
+
+  - credentials (password/secret/token/key fields, Basic auth) are replaced;
+    request bodies that are neither JSON nor form data are kept only as their
+    content type and size, since they cannot be redacted
+  - session tokens become stable aliases ("s1", "s2", ...) in the "session"
+    field and as "{s1}" placeholders where a token appears in the path
+  - response bodies are not stored; only the id of a created object is kept
+    so that replay.py can map it to the id the replay target hands out
+  - the tenant (URL prefix or X-Mock-Tenant header) is kept, so replays of
+    multi-tenant traffic reach the same tenants
+
+Paths ending in .gz are written gzip-compressed. When recording is off the
+per-request cost is a single attribute check.
+"""
+
+import base64
+import gzip
+import json
+import re
+import threading
+import time
+from urllib.parse import parse_qsl, urlencode
+
+DEFAULT_ROUTE = r'^/(api|Services)/'
+REDACTED = '***'
+SECRET_KEY_PATTERN = re.compile(r'pass|secret|token|key', re.IGNORECASE)
+MAX_TEXT_BODY = 4096
+
+
+def redact(value):
+    """Return a copy of a decoded JSON value with secret-looking fields replaced"""
+    if isinstance(value, dict):
+        return {k: REDACTED if SECRET_KEY_PATTERN.search(k) else redact(v)
+                for k, v in value.items()}
+    if isinstance(value, list):
+        return [redact(v) for v in value]
+    return value
+
+
+def open_trace(path, mode='rt'):
+    """Open a trace file, transparently handling .gz compression"""
+    if path.endswith('.gz'):
+        return gzip.open(path, mode, encoding='utf-8')
+    return open(path, mode, encoding='utf-8')
+
+
+class TrafficRecorder:
+    """Writes redacted request traces for requests matching a route pattern"""
+
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.route = None
+        self._pattern = None
+        self._file = None
+        self._lock = threading.Lock()
+        self._started = 0.0
+        self._aliases = {}
+        self.recorded_requests = 0
+
+    def start(self, path, route=DEFAULT_ROUTE):
+        """Start recording to path (truncated), closing any previous recording"""
+        pattern = re.compile(route)
+        trace = open_trace(path, 'wt')
+
+        self.stop()
+        with self._lock:
+            self.path = path
+            self.route = route
+            self._pattern = pattern
+            self._file = trace
+            self._aliases = {}
+            self.recorded_requests = 0
+            self._started = time.perf_counter()
+        self.enabled = True
+
+    def stop(self):
+        """Stop recording and close the trace file"""
+        self.enabled = False
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def status(self):
+        """Return the current configuration and counters"""
+        return {
+            "enabled": self.enabled,
+            "path": self.path,
+            "route": self.route,
+            "recorded_requests": self.recorded_requests,
+            "sessions": len(self._aliases)
+        }
+
+    def begin_request(self, path):
+        """Return a start timestamp if the request should be recorded, else None"""
+        if not self.enabled or not self._pattern.search(path):
+            return None
+        return time.perf_counter()
+
+    def record(self, request, response, started):
+        """Append a redacted trace entry for a finished request"""
+        finished = time.perf_counter()
+        entry = {
+            "t": round(started - self._started, 6),
+            "ms": round((finished - started) * 1000.0, 3),
+            "method": request.method,
+            "path": request.path,
+            "status": response.status_code
+        }
+        tenant = request.environ.get('mock.tenant') or request.headers.get('X-Mock-Tenant')
+        if tenant:
+            entry["tenant"] = tenant
+
+        # Decode outside the lock; only aliasing and writing need it
+        if request.args:
+            entry["query"] = [[k, REDACTED if SECRET_KEY_PATTERN.search(k) else v]
+                              for k, v in parse_qsl(request.query_string.decode('utf-8', 'replace'),
+                                                    keep_blank_values=True)]
+        self._describe_body(entry, request)
+        token, created = self._issued(request, response)
+
+        with self._lock:
+            if self._file is None:
+                return
+            self._describe_auth(entry, request.headers.get('Authorization', ''))
+            if token:
+                entry["session"] = self._alias(token)
+            elif created is not None:
+                entry["created"] = created
+
+            # Tokens can appear in paths (DELETE /sessions/<token>); swap in the alias
+            for token, alias in self._aliases.items():
+                if token in entry["path"]:
+                    entry["path"] = entry["path"].replace(token, '{' + alias + '}')
+
+            self._file.write(json.dumps(entry, separators=(',', ':')) + "\n")
+            self.recorded_requests += 1
+
+    def _alias(self, token):
+        """Return the stable alias for a session token (caller holds the lock)"""
+        alias = self._aliases.get(token)
+        if alias is None:
+            alias = f"s{len(self._aliases) + 1}"
+            self._aliases[token] = alias
+        return alias
+
+    def _describe_auth(self, entry, header):
+        """Record the auth scheme and session alias without the credential itself"""
+        if header.startswith('Bearer '):
+            entry["auth"] = 'Bearer'
+            entry["session"] = self._alias(header[len('Bearer '):])
+        elif header.startswith('BAMAuthToken: '):
+            entry["auth"] = 'BAMAuthToken'
+            entry["session"] = self._alias(header[len('BAMAuthToken: '):])
+        elif header.startswith('Basic '):
+            entry["auth"] = 'Basic'
+            try:
+                username = base64.b64decode(header[len('Basic '):]).decode('utf-8').split(':', 1)[0]
+            except (ValueError, UnicodeDecodeError):
+                username = None
+            if username:
+                entry["user"] = username
+
+    def _describe_body(self, entry, request):
+        """
+        Record the request body, redacted. Small bodies sent with another content
+        type are kept as text when they parse as JSON or form data; anything else
+        only by content type and size
+        """
+        if not request.content_length:
+            return
+        data = request.get_json(silent=True)
+        if data is not None:
+            entry["body"] = redact(data)
+            self._describe_user(entry, data)
+            return
+
+        if request.content_type:
+            entry["type"] = request.content_type
+        text = request.get_data(as_text=True) if request.content_length <= MAX_TEXT_BODY else ''
+        try:
+            data = json.loads(text)
+        except ValueError:
+            data = None
+        if data is not None:
+            entry["text"] = json.dumps(redact(data), separators=(',', ':'))
+            self._describe_user(entry, data)
+            return
+        try:
+            fields = parse_qsl(text, keep_blank_values=True, strict_parsing=True)
+        except ValueError:
+            fields = None
+        if fields:
+            entry["text"] = urlencode([(k, REDACTED if SECRET_KEY_PATTERN.search(k) else v) for k, v in fields])
+            self._describe_user(entry, dict(fields))
+        else:
+            entry["size"] = request.content_length
+
+    def _describe_user(self, entry, data):
+        """Keep the username of a login body, which replay.py needs to log in as"""
+        if isinstance(data, dict) and data.get('username'):
+            entry["user"] = data['username']
+
+    def _issued(self, request, response):
+        """
+        Return (session token, created id) from a login or POST response. Other
+        responses, large GET listings included, are not parsed.
+        """
+        if request.method != 'POST' and not request.path.endswith('/login'):
+            return None, None
+        if response.is_streamed or not 200 <= response.status_code < 300 or not response.is_json:
+            return None, None
+        data = response.get_json(silent=True)
+        if not isinstance(data, dict):
+            return None, None
+        if data.get('token'):
+            return data['token'], None
+        if request.method == 'POST' and data.get('id') is not None:
+            return None, data['id']
+        return None, None
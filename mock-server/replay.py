@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Replay a traffic trace recorded by the mock BlueCat API server (--record or
+/admin/recording) against the mock or any local stand-in, and report the
+latency distribution.
+
+Requests are grouped into streams by session. Each stream is replayed in order
+while streams run concurrently, so the original concurrency is kept:
+
+  --speed 1     original timing
+  --speed 10    ten times faster (any factor works)
+  --speed max   no waiting; streams start as soon as one of the peak number of
+                concurrently active recorded sessions finishes
+
+Session tokens and the ids of records and deployment jobs created during the
+recording are remapped to the ones the replay target hands out. Requests keep
+their recorded tenant (sent as X-Mock-Tenant); missing tenants are created on
+the target first. Passwords are
+redacted in traces, so logins use --password (any value works for the mock).
+
+Usage: python replay.py trace.jsonl [--base-url URL] [--speed 1|10|max] [--json FILE]
+"""
+
+import argparse
+import base64
+import json
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict, defaultdict
+from urllib.parse import urlencode
+
+from recorder import REDACTED, SECRET_KEY_PATTERN, open_trace
+
+# Path segments followed by the id of an object the trace may have created
+REMAP_SEGMENTS = ('records', 'entities', 'deployments')
+# Query and body fields that carry such ids
+REMAP_KEYS = ('id', 'entityId', 'recordId', 'entityIds')
+PERCENTILES = (50, 90, 95, 99)
+
+
+def load_trace(path):
+    """Return trace entries sorted by start offset, shifted so the first starts at 0"""
+    with open_trace(path) as trace:
+        entries = [json.loads(line) for line in trace if line.strip()]
+    entries.sort(key=lambda e: e['t'])
+    origin = entries[0]['t'] if entries else 0.0
+    for entry in entries:
+        entry['t'] -= origin
+    return entries
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def peak_concurrency(intervals):
+    """Largest number of overlapping (start, end) intervals"""
+    events = sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals])
+    peak = current = 0
+    for _, delta in events:
+        current += delta
+        peak = max(peak, current)
+    return peak
+
+
+def recorded_peak_sessions(entries):
+    """Most sessions that were active at once in the recording"""
+    sessions = defaultdict(list)
+    for entry in entries:
+        sessions[entry.get('session') or 'anonymous'].append(entry)
+    return peak_concurrency(
+        [(s[0]['t'], s[-1]['t'] + s[-1]['ms'] / 1000.0) for s in sessions.values()])
+
+
+def endpoint_of(entry):
+    """Group key for a request: method plus path with ids and tokens collapsed"""
+    segments = []
+    for segment in entry['path'].split('/'):
+        if segment.isdigit() or segment.startswith('{') or len(segment) == 36 and segment.count('-') == 4:
+            segment = '{id}'
+        segments.append(segment)
+    return f"{entry['method']} {'/'.join(segments)}"
+
+
+class Replayer:
+    """Re-issues recorded streams against a base URL and collects latencies"""
+
+    def __init__(self, base_url, speed=None, username='replay', password='replay', timeout=30.0):
+        self.base_url = base_url.rstrip('/')
+        self.speed = speed
+        self.username = username
+        self.password = password
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._ids = {}
+        self._tokens = {}
+        self.results = []
+        self.peak_active = 0
+        self._active = 0
+
+    def run(self, entries, concurrency=None):
+        """Replay all entries; returns wall-clock seconds"""
+        streams = OrderedDict()
+        for entry in entries:
+            streams.setdefault(entry.get('session') or 'anonymous', []).append(entry)
+
+        self._create_tenants({entry['tenant'] for entry in entries if entry.get('tenant')})
+
+        slots = threading.Semaphore(concurrency) if self.speed is None else None
+        threads = []
+        started = time.perf_counter()
+
+        for stream in streams.values():
+            if slots is not None:
+                slots.acquire()
+            else:
+                self._sleep_until(started, stream[0]['t'])
+            thread = threading.Thread(target=self._run_stream, args=(stream, started, slots), daemon=True)
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - started
+
+    def _create_tenants(self, names):
+        """Create the recorded tenants on the target (existing ones answer 409)"""
+        for name in sorted(names):
+            self._send('POST', self.base_url + '/admin/tenants', json.dumps({"name": name}).encode('utf-8'),
+                       {'Content-Type': 'application/json'})
+
+    def _sleep_until(self, started, offset):
+        """Wait until a recorded offset, scaled by the replay speed"""
+        delay = started + offset / self.speed - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _run_stream(self, stream, started, slots):
+        """Issue one session's requests in recorded order"""
+        with self._lock:
+            self._active += 1
+            self.peak_active = max(self.peak_active, self._active)
+        try:
+            for entry in stream:
+                if self.speed is not None:
+                    self._sleep_until(started, entry['t'])
+                self._replay(entry)
+        finally:
+            with self._lock:
+                self._active -= 1
+            if slots is not None:
+                slots.release()
+
+    def _replay(self, entry):
+        """Issue one request and record its latency and status"""
+        session = entry.get('session')
+        tenant = entry.get('tenant')
+        headers = {'X-Mock-Tenant': tenant} if tenant else {}
+        data = None
+
+        auth = entry.get('auth')
+        if auth == 'Basic':
+            credentials = f"{entry.get('user', self.username)}:{self.password}"
+            headers['Authorization'] = 'Basic ' + base64.b64encode(credentials.encode('utf-8')).decode('ascii')
+        elif auth in ('Bearer', 'BAMAuthToken') and session:
+            token = self._token(session, tenant)
+            headers['Authorization'] = f"Bearer {token}" if auth == 'Bearer' else f"BAMAuthToken: {token}"
+
+        if 'body' in entry:
+            data = json.dumps(self._remap_body(entry['body'], tenant)).encode('utf-8')
+            headers['Content-Type'] = 'application/json'
+        elif 'text' in entry:
+            data = entry['text'].encode('utf-8')
+        elif 'size' in entry:
+            data = b' ' * entry['size']
+        if data is not None and 'type' in entry:
+            headers['Content-Type'] = entry['type']
+
+        url = self.base_url + self._remap_path(entry['path'], tenant)
+        if entry.get('query'):
+            url += '?' + urlencode([(k, self._remap_query(k, v, tenant)) for k, v in entry['query']])
+
+        status, body, elapsed = self._send(entry['method'], url, data, headers)
+        self._learn(entry, status, body)
+
+        with self._lock:
+            self.results.append((endpoint_of(entry), elapsed, status, entry['status'], entry['ms']))
+
+    def _send(self, method, url, data, headers):
+        """Return (status, body bytes, latency in ms); connection errors give status 0"""
+        req = urllib.request.Request(url, data=data, method=method, headers=headers)
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(req, timeout=self.timeout) as response:
+                body = response.read()
+                status = response.status
+        except urllib.error.HTTPError as e:
+            body = e.read()
+            status = e.code
+        except (urllib.error.URLError, OSError):
+            body = b''
+            status = 0
+        return status, body, (time.perf_counter() - start) * 1000.0
+
+    def _learn(self, entry, status, body):
+        """Map the recorded session alias or created id to what the target returned"""
+        if not 200 <= status < 300 or not ('created' in entry or entry.get('session')):
+            return
+        try:
+            data = json.loads(body)
+        except ValueError:
+            return
+        if not isinstance(data, dict):
+            return
+        with self._lock:
+            if data.get('token') and entry.get('session'):
+                self._tokens[entry['session']] = data['token']
+            elif 'created' in entry and data.get('id') is not None:
+                self._ids[(entry.get('tenant'), str(entry['created']))] = data['id']
+
+    def _token(self, session, tenant=None):
+        """Return the replay token for a session alias, logging in if it was never seen"""
+        with self._lock:
+            token = self._tokens.get(session)
+        if token is None:
+            body = json.dumps({"username": self.username, "password": self.password}).encode('utf-8')
+            headers = {'Content-Type': 'application/json'}
+            if tenant:
+                headers['X-Mock-Tenant'] = tenant
+            status, response, _ = self._send('POST', self.base_url + '/api/v2/sessions', body, headers)
+            try:
+                token = json.loads(response).get('token', '') if status == 200 else ''
+            except ValueError:
+                token = ''
+            with self._lock:
+                token = self._tokens.setdefault(session, token)
+        return token
+
+    def _mapped(self, value, tenant):
+        """Return the replay id for a recorded id (ids are per tenant), or the value unchanged"""
+        with self._lock:
+            return self._ids.get((tenant, str(value)), value)
+
+    def _remap_path(self, path, tenant):
+        segments = path.split('/')
+        for i, segment in enumerate(segments):
+            if segment.startswith('{') and segment.endswith('}'):
+                segments[i] = self._token(segment[1:-1], tenant)
+            elif i and segments[i - 1] in REMAP_SEGMENTS:
+                segments[i] = str(self._mapped(segment, tenant))
+        return '/'.join(segments)
+
+    def _remap_query(self, key, value, tenant):
+        if value == REDACTED and SECRET_KEY_PATTERN.search(key):
+            return self.password
+        return str(self._mapped(value, tenant)) if key in REMAP_KEYS else value
+
+    def _remap_body(self, body, tenant):
+        if isinstance(body, list):
+            return [self._remap_body(v, tenant) for v in body]
+        if not isinstance(body, dict):
+            return body
+        remapped = {}
+        for key, value in body.items():
+            if value == REDACTED and SECRET_KEY_PATTERN.search(key):
+                value = self.password
+            elif key in REMAP_KEYS:
+                value = ([self._mapped(v, tenant) for v in value] if isinstance(value, list)
+                         else self._mapped(value, tenant))
+            elif isinstance(value, (dict, list)):
+                value = self._remap_body(value, tenant)
+            remapped[key] = value
+        return remapped
+
+
+def summarize(entries, replayer, wall):
+    """Build the report as a dict"""
+    recorded = sorted(e['ms'] for e in entries)
+    replayed = sorted(r[1] for r in replayer.results)
+    mismatches = [r for r in replayer.results if r[2] != r[3]]
+
+    by_endpoint = defaultdict(list)
+    for endpoint, elapsed, *_ in replayer.results:
+        by_endpoint[endpoint].append(elapsed)
+
+    def distribution(values):
+        values = sorted(values)
+        stats = {f"p{p}": round(percentile(values, p), 3) for p in PERCENTILES}
+        stats["max"] = round(values[-1], 3) if values else 0.0
+        stats["count"] = len(values)
+        return stats
+
+    recorded_wall = max((e['t'] + e['ms'] / 1000.0 for e in entries), default=0.0)
+
+    return {
+        "requests": len(replayer.results),
+        "wall_seconds": round(wall, 3),
+        "recorded_wall_seconds": round(recorded_wall, 3),
+        "requests_per_second": round(len(replayer.results) / wall, 1) if wall else 0.0,
+        "recorded_peak_sessions": recorded_peak_sessions(entries),
+        "replay_peak_sessions": replayer.peak_active,
+        "status_mismatches": len(mismatches),
+        "mismatch_examples": [
+            {"endpoint": r[0], "recorded": r[3], "replayed": r[2]} for r in mismatches[:10]
+        ],
+        "latency_ms": distribution(replayed),
+        "recorded_latency_ms": distribution(recorded),
+        "endpoints": {k: distribution(v) for k, v in sorted(by_endpoint.items())}
+    }
+
+
+def print_report(report, out=sys.stdout):
+    """Print the report as aligned text"""
+    columns = [f"p{p}" for p in PERCENTILES] + ["max"]
+
+    def row(label, stats):
+        values = ''.join(f"{stats[c]:>10.1f}" for c in columns)
+        return f"  {label:<52} {stats['count']:>7}{values}"
+
+    out.write(f"{report['requests']} requests in {report['wall_seconds']:.2f}s "
+              f"({report['requests_per_second']:.1f} req/s; recorded run took "
+              f"{report['recorded_wall_seconds']:.2f}s)\n")
+    out.write(f"peak concurrent sessions: recorded {report['recorded_peak_sessions']}, "
+              f"replayed {report['replay_peak_sessions']}\n")
+    out.write(f"status mismatches: {report['status_mismatches']}\n")
+    for example in report['mismatch_examples']:
+        out.write(f"  {example['endpoint']}: recorded {example['recorded']}, got {example['replayed']}\n")
+
+    out.write(f"\nlatency (ms)  {'':<40} {'count':>7}" + ''.join(f"{c:>10}" for c in columns) + "\n")
+    out.write(row("replayed", report['latency_ms']) + "\n")
+    out.write(row("recorded", report['recorded_latency_ms']) + "\n")
+    out.write("\n")
+    for endpoint, stats in report['endpoints'].items():
+        out.write(row(endpoint, stats) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay a recorded mock server trace")
+    parser.add_argument('trace', help="trace file written by server.py --record")
+    parser.add_argument('--base-url', default='http://localhost:5001',
+                        help="server to replay against (may include a /tenants/<name> prefix)")
+    parser.add_argument('--speed', default='1', help="time scale factor (e.g. 1, 10) or 'max'")
+    parser.add_argument('--concurrency', type=int,
+                        help="sessions in flight at --speed max (default: recorded peak)")
+    parser.add_argument('--username', default='replay', help="user for sessions missing from the trace")
+    parser.add_argument('--password', default='replay', help="password sent in place of redacted ones")
+    parser.add_argument('--timeout', type=float, default=30.0, help="per-request timeout in seconds")
+    parser.add_argument('--json', metavar='FILE', help="also write the report as JSON")
+    args = parser.parse_args()
+
+    if args.speed == 'max':
+        speed = None
+    else:
+        speed = float(args.speed)
+        if speed <= 0:
+            parser.error("--speed must be positive or 'max'")
+
+    entries = load_trace(args.trace)
+    if not entries:
+        parser.error(f"{args.trace} contains no requests")
+
+    replayer = Replayer(args.base_url, speed=speed, username=args.username,
+                        password=args.password, timeout=args.timeout)
+    concurrency = args.concurrency or recorded_peak_sessions(entries)
+
+    wall = replayer.run(entries, concurrency=max(concurrency, 1))
+    report = summarize(entries, replayer, wall)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as out:
+            json.dump(report, out, indent=2)
+
+
+if __name__ == '__main__':
+    main()
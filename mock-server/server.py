@@ -4,41 +4,510 @@ Mock BlueCat API Server for Testing
 This server simulates BlueCat's REST API endpoints for testing the Terraform module locally.
 """
 
-from flask import Flask, request, jsonify, make_response
+from flask import Flask, request, jsonify, make_response, g, has_request_context, stream_with_context
+from werkzeug.local import LocalProxy
+import argparse
 import base64
+import gzip
+import hashlib
+import io
 import json
+import re
 import uuid
+import zlib
 from datetime import datetime, timedelta
 import threading
 import time
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+from dataset import Dataset, DEFAULT_VIEWS
+from idempotency import IN_PROGRESS, MISMATCH, REPLAY, IdempotencyCache
+from limits import LoadLimiter
+from profiling import RequestProfiler
+from recorder import DEFAULT_ROUTE as DEFAULT_RECORD_ROUTE, TrafficRecorder
+from zone_index import ZoneIndex
+from zonefile import ZoneFileError, ZoneFileStats, parse_zone_file, write_zone_file
+
+# Optional faster JSON encoder; falls back to the standard library when missing
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 app = Flask(__name__)
 
-# In-memory storage for testing
-tokens = {}
-zones = {
+# Response compression settings (applied when the client sends Accept-Encoding)
+COMPRESSION_MIN_SIZE = 1024
+COMPRESSION_LEVEL = 5
+
+# Zones every tenant starts with
+DEFAULT_ZONES = {
     "queue.core.windows.net": {"id": 100001, "name": "queue.core.windows.net", "view": "internal"},
     "queue.core.windows.net_external": {"id": 100004, "name": "queue.core.windows.net", "view": "external"},
     "privatelink.queue.core.windows.net": {"id": 100002, "name": "privatelink.queue.core.windows.net", "view": "internal"}, 
     "example.com": {"id": 100003, "name": "example.com", "view": "default"}
 }
-records = {}
-record_counter = 200000
+DEFAULT_TENANT = "default"
+
+# DNS servers the deployment roles of every zone point at
+ZONE_DEPLOYMENT_SERVERS = (200001, 200002)
+
+# Simulate appliances that reject DifferentialDeployment (--reject-differential)
+REJECT_DIFFERENTIAL = False
+
+# Finished deployment jobs kept per tenant for status polling
+MAX_DEPLOYMENT_JOBS = 10000
+
+# Records parsed from a zone file are stored in batches of this size, so the
+# tenant lock is never held for a whole import
+ZONE_IMPORT_BATCH = 1000
+TENANT_NAME_PATTERN = re.compile(r'^[A-Za-z0-9][A-Za-z0-9_.-]{0,63}$')
+
+class Tenant:
+    """Isolated in-memory storage (tokens, zones, records, counters) for one namespace"""
+    
+    def __init__(self, name):
+        self.name = name
+        self.lock = threading.Lock()
+        self.reset()
+    
+    def reset(self):
+        """Restore the initial state: default zones, no records, no sessions"""
+        self.tokens = {}
+        self.zones = {key: dict(zone) for key, zone in DEFAULT_ZONES.items()}
+        self.zone_index = ZoneIndex(self.zones.values())
+        self.records = {}
+        self.record_counter = 200000
+        # Deployment tracking: zone id -> {record id: change sequence}, and
+        # (zone id, server id) -> change sequence at that server's last deployment
+        self.zone_changes = {}
+        self.deployed_seq = {}
+        self.change_seq = 0
+        # Deployment jobs by id, oldest first
+        self.deployments = OrderedDict()
+        # Responses of create requests that carried an Idempotency-Key
+        self.idempotency = IdempotencyCache()
+    
+    def add_zone(self, zone):
+        """Store and index a zone; same-named zones in other views get a "_<view>" key suffix"""
+        key = zone['name']
+        if key in self.zones:
+            key = f"{zone['name']}_{zone['view']}"
+        self.zones[key] = zone
+        self.zone_index.add(zone)
+        return key
+    
+    def find_zone(self, name, view=None):
+        """Return (key, zone) for a zone name, optionally in a given view, or (None, None)"""
+        name = name.rstrip('.').lower()
+        for key, zone in list(self.zones.items()):
+            if zone['name'].lower() == name and (not view or zone.get('view') == view):
+                return key, zone
+        return None, None
+    
+    def next_record_id(self):
+        """Allocate a new record id"""
+        with self.lock:
+            self.record_counter += 1
+            return self.record_counter
+    
+    def mark_dirty(self, zone_id, record_id):
+        """Record that a record in a zone changed since the last deployment"""
+        with self.lock:
+            self.change_seq += 1
+            self.zone_changes.setdefault(int(zone_id), {})[record_id] = self.change_seq
+    
+    def pending_changes(self, zone_id, server_id):
+        """Return the number of records changed in a zone since it was last deployed to a server"""
+        zone_id = int(zone_id)
+        with self.lock:
+            deployed = self.deployed_seq.get((zone_id, int(server_id)), 0)
+            return sum(1 for seq in self.zone_changes.get(zone_id, {}).values() if seq > deployed)
+    
+    def mark_deployed(self, zone_id, server_id, seq=None):
+        """Mark a zone as deployed to a server (up to change seq) and drop changes every server has received"""
+        zone_id = int(zone_id)
+        with self.lock:
+            self.deployed_seq[(zone_id, int(server_id))] = self.change_seq if seq is None else seq
+            
+            changes = self.zone_changes.get(zone_id)
+            if changes:
+                servers = set(ZONE_DEPLOYMENT_SERVERS) | {int(server_id)}
+                oldest = min(self.deployed_seq.get((zone_id, sid), 0) for sid in servers)
+                self.zone_changes[zone_id] = {rid: seq for rid, seq in changes.items() if seq > oldest}
+    
+    def add_deployment(self, job):
+        """Store a deployment job, evicting the oldest finished jobs beyond the limit"""
+        with self.lock:
+            self.deployments[job['id']] = job
+            while len(self.deployments) > MAX_DEPLOYMENT_JOBS:
+                oldest_id, oldest = next(iter(self.deployments.items()))
+                if oldest['status'] not in ('completed', 'failed'):
+                    break
+                del self.deployments[oldest_id]
+    
+    def summary(self):
+        """Return counts for the admin API"""
+        return {
+            "name": self.name,
+            "active_tokens": len(self.tokens),
+            "total_records": len(self.records),
+            "zones": len(self.zones),
+            "idempotency_keys": len(self.idempotency)
+        }
+
+tenants = {DEFAULT_TENANT: Tenant(DEFAULT_TENANT)}
+tenants_lock = threading.Lock()
+
+class DeploymentQueue:
+    """
+    Runs deployments as background jobs on a worker pool, one at a time per server.
+    Each server has a FIFO of its jobs; a job is handed to the pool only once it is
+    at the head of the FIFOs of all its servers, so jobs waiting for a busy server
+    never occupy a worker that another server's job could use.
+    """
+    
+    def __init__(self, workers=4, base_seconds=0.2, seconds_per_record=0.0):
+        self._lock = threading.Lock()
+        # (tenant, server id) -> jobs for that server; the head one is running
+        self._server_queues = {}
+        self._job_servers = {}
+        self.pool = None
+        self.configure(workers, base_seconds, seconds_per_record)
+    
+    def configure(self, workers, base_seconds, seconds_per_record):
+        """Set the pool size and the simulated duration (base + per shipped record)"""
+        self.base_seconds = base_seconds
+        self.seconds_per_record = seconds_per_record
+        old_pool, self.pool = self.pool, ThreadPoolExecutor(max_workers=workers, thread_name_prefix='deploy')
+        if old_pool is not None:
+            old_pool.shutdown(wait=False)
+    
+    def submit(self, tenant, deployment_type, server_ids, zone_ids, **details):
+        """Queue a deployment of zones to servers and return the job"""
+        job_id = str(uuid.uuid4())
+        job = {
+            "id": job_id,
+            "deploymentId": job_id,
+            "type": deployment_type,
+            "status": "queued",
+            "serverIds": [int(sid) for sid in server_ids],
+            "entityIds": [int(zid) for zid in zone_ids],
+            "submitted": datetime.now().isoformat(),
+            "started": None,
+            "completed": None,
+            "deltaSize": None,
+            "recordsShipped": None,
+            **details
+        }
+        tenant.add_deployment(job)
+        
+        keys = [(tenant, sid) for sid in sorted(set(job['serverIds']))]
+        with self._lock:
+            self._job_servers[job_id] = keys
+            for key in keys:
+                self._server_queues.setdefault(key, deque()).append(job)
+            ready = self._at_head(job)
+        if ready:
+            self.pool.submit(self._run, tenant, job)
+        return job
+    
+    def _at_head(self, job):
+        """Whether a job is next for all its servers (call with the lock held)"""
+        return all(self._server_queues[key][0] is job for key in self._job_servers[job['id']])
+    
+    def _finish(self, tenant, job):
+        """Take a finished job off its servers' FIFOs and start the jobs now at the head"""
+        ready = {}
+        with self._lock:
+            for key in self._job_servers.pop(job['id']):
+                queue = self._server_queues[key]
+                queue.popleft()
+                if not queue:
+                    del self._server_queues[key]
+                elif self._at_head(queue[0]):
+                    ready[queue[0]['id']] = queue[0]
+        for next_job in ready.values():
+            self.pool.submit(self._run, tenant, next_job)
+    
+    def _run(self, tenant, job):
+        """Execute a job; its servers run nothing else until it finishes"""
+        try:
+            job['status'] = 'running'
+            job['started'] = datetime.now().isoformat()
+            
+            # A full deployment ships every record in the zone; the other types only
+            # the records changed since the last deployment to that server
+            zone_sizes = None
+            if job['type'] == 'FullDeployment':
+                zone_sizes = Counter(int(r['parentId']) for r in list(tenant.records.values()))
+            
+            delta_size = shipped = 0
+            deployed = []
+            for zone_id in job['entityIds']:
+                for server_id in job['serverIds']:
+                    seq = tenant.change_seq
+                    pending = tenant.pending_changes(zone_id, server_id)
+                    delta_size += pending
+                    shipped += zone_sizes[zone_id] if zone_sizes is not None else pending
+                    deployed.append((zone_id, server_id, seq))
+            
+            time.sleep(self.base_seconds + self.seconds_per_record * shipped)
+            
+            for zone_id, server_id, seq in deployed:
+                tenant.mark_deployed(zone_id, server_id, seq)
+            
+            job['deltaSize'] = delta_size
+            job['recordsShipped'] = shipped
+            job['status'] = 'completed'
+            print(f"Mock deployment {job['id']}: Type={job['type']}, Servers={job['serverIds']}, "
+                  f"Entities={job['entityIds']}, Delta={delta_size}, Shipped={shipped}")
+        except Exception as e:
+            job['status'] = 'failed'
+            job['error'] = str(e)
+        finally:
+            job['completed'] = datetime.now().isoformat()
+            self._finish(tenant, job)
+
+deployment_queue = DeploymentQueue()
+
+def current_tenant():
+    """Return the tenant selected for this request (the default tenant outside requests)"""
+    if has_request_context():
+        tenant = g.get('tenant')
+        if tenant is not None:
+            return tenant
+    return tenants[DEFAULT_TENANT]
+
+# In-memory storage for testing, scoped to the current tenant
+tokens = LocalProxy(lambda: current_tenant().tokens)
+zones = LocalProxy(lambda: current_tenant().zones)
+records = LocalProxy(lambda: current_tenant().records)
+profiler = RequestProfiler()
+limiter = LoadLimiter()
+recorder = TrafficRecorder()
+
+class TenantPrefixMiddleware:
+    """Route /tenants/<name>/<path> to <path> with the tenant recorded in the environ"""
+    
+    prefix = '/tenants/'
+    
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+    
+    def __call__(self, environ, start_response):
+        path = environ.get('PATH_INFO', '')
+        if path.startswith(self.prefix):
+            name, _, remainder = path[len(self.prefix):].partition('/')
+            environ['mock.tenant'] = name
+            environ['SCRIPT_NAME'] = environ.get('SCRIPT_NAME', '') + self.prefix + name
+            environ['PATH_INFO'] = '/' + remainder
+        return self.wsgi_app(environ, start_response)
+
+app.wsgi_app = TenantPrefixMiddleware(app.wsgi_app)
 
 def cleanup_expired_tokens():
     """Clean up expired tokens every minute"""
     while True:
         current_time = datetime.now()
-        expired_tokens = [token for token, data in tokens.items() 
-                         if data['expires'] < current_time]
-        for token in expired_tokens:
-            del tokens[token]
+        for tenant in list(tenants.values()):
+            expired_tokens = [token for token, data in list(tenant.tokens.items())
+                             if data['expires'] < current_time]
+            for token in expired_tokens:
+                tenant.tokens.pop(token, None)
         time.sleep(60)
 
 # Start token cleanup thread
 cleanup_thread = threading.Thread(target=cleanup_expired_tokens, daemon=True)
 cleanup_thread.start()
 
+def load_dataset(dataset, tenant=None):
+    """Bulk-load a generated dataset straight into a tenant's store (no HTTP)"""
+    tenant = tenant or current_tenant()
+    
+    for zone in dataset.zones:
+        tenant.add_zone(zone)
+    
+    with tenant.lock:
+        next_id = tenant.record_counter
+        created = datetime.now().isoformat()
+        for next_id, record_data in enumerate(dataset.records(created), start=tenant.record_counter + 1):
+            tenant.records[next_id] = record_data
+        tenant.record_counter = next_id
+
+def import_zone_file(lines, origin, tenant=None, view=None, replace=False):
+    """
+    Stream a zone file into a tenant's store in one pass (no HTTP), creating the zone
+    if needed. Returns (zone, stats); raises ZoneFileError for malformed input, with
+    the records before the bad line already stored.
+    """
+    tenant = tenant or current_tenant()
+    key, zone = tenant.find_zone(origin, view)
+    if zone is None:
+        # Allocate the id and store the zone together, or concurrent imports could share an id
+        with tenant.lock:
+            key, zone = tenant.find_zone(origin, view)
+            if zone is None:
+                zone_id = max(z['id'] for z in tenant.zones.values()) + 1
+                zone = {"id": zone_id, "name": origin.rstrip('.'), "view": view or "default"}
+                key = tenant.add_zone(zone)
+    
+    if replace:
+        with tenant.lock:
+            stale = [rid for rid, r in tenant.records.items() if r['parentId'] == zone['id']]
+            for rid in stale:
+                del tenant.records[rid]
+        for rid in stale:
+            tenant.mark_dirty(zone['id'], rid)
+            tenant.idempotency.forget_record(rid)
+    
+    created = datetime.now().isoformat()
+    
+    def store(batch):
+        stored = []
+        with tenant.lock:
+            for entry in batch:
+                tenant.record_counter += 1
+                entry['zone'] = key
+                entry['parentId'] = zone['id']
+                entry['created'] = created
+                tenant.records[tenant.record_counter] = entry
+                stored.append(tenant.record_counter)
+        # Imported records are pending changes for the next differential deployment
+        for record_id in stored:
+            tenant.mark_dirty(zone['id'], record_id)
+    
+    stats = ZoneFileStats()
+    batch = []
+    try:
+        for entry in parse_zone_file(lines, zone['name'], stats=stats):
+            batch.append(entry)
+            if len(batch) >= ZONE_IMPORT_BATCH:
+                store(batch)
+                batch = []
+    finally:
+        store(batch)
+    return zone, stats
+
+def record_fqdn(record_data):
+    """Full name of a stored record; apex records are stored under the zone name"""
+    # record_data['zone'] is the zones key, which has a "_<view>" suffix for zones in other views
+    key = record_data['zone']
+    zone = zones[key]['name'] if key in zones else key
+    name = record_data['name']
+    if name in ('', '@') or name.lower() == zone.lower():
+        return zone
+    return f"{name}.{zone}"
+
+def fast_jsonify(payload, status=200):
+    """Serialize a large payload to a compact JSON response (orjson when installed)"""
+    if orjson is not None:
+        body = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS)
+    else:
+        body = json.dumps(payload, separators=(',', ':')).encode('utf-8')
+    return app.response_class(body, status=status, mimetype='application/json')
+
+@app.before_request
+def select_tenant():
+    """Select the tenant from the /tenants/<name> URL prefix or the X-Mock-Tenant header"""
+    name = request.environ.get('mock.tenant') or request.headers.get('X-Mock-Tenant')
+    if not name or request.path.startswith('/admin/'):
+        return None
+    
+    tenant = tenants.get(name)
+    if tenant is None:
+        return jsonify({"error": f"Unknown tenant: {name}"}), 404
+    g.tenant = tenant
+    return None
+
+@app.before_request
+def start_profiling():
+    """Begin profiling the request when profiling is enabled and the route matches"""
+    if profiler.enabled and not request.path.startswith('/admin/'):
+        g.profile_handle = profiler.begin_request(request.path)
+
+@app.teardown_request
+def stop_profiling(exc):
+    """Finish profiling the request, if it was profiled"""
+    handle = g.pop('profile_handle', None)
+    if handle is not None:
+        profiler.end_request(handle)
+
+@app.before_request
+def apply_load_limits():
+    """Reject API requests beyond the simulated rate and concurrency limits"""
+    if not request.path.startswith(('/api/', '/Services/')):
+        return None
+    
+    rejected = limiter.enter()
+    if rejected is None:
+        g.load_admitted = True
+        return None
+    
+    status, retry_after, message = rejected
+    response = jsonify({"error": message})
+    response.status_code = status
+    response.headers['Retry-After'] = str(retry_after)
+    return response
+
+@app.teardown_request
+def release_load_limits(exc):
+    """Count the request out of the in-flight total"""
+    if g.pop('load_admitted', False):
+        limiter.leave()
+
+@app.after_request
+def compress_response(response):
+    """Compress responses with gzip or deflate when the client accepts it"""
+    if (response.direct_passthrough or response.is_streamed
+            or 'Content-Encoding' in response.headers
+            or not 200 <= response.status_code < 300):
+        return response
+    
+    encoding = request.accept_encodings.best_match(['gzip', 'deflate'])
+    if not encoding:
+        return response
+    
+    body = response.get_data()
+    if len(body) < COMPRESSION_MIN_SIZE:
+        return response
+    
+    if encoding == 'gzip':
+        body = gzip.compress(body, compresslevel=COMPRESSION_LEVEL, mtime=0)
+    else:
+        body = zlib.compress(body, COMPRESSION_LEVEL)
+    
+    response.set_data(body)
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+@app.before_request
+def start_recording():
+    """Note the start time of requests the traffic recorder should capture"""
+    if recorder.enabled and not request.path.startswith('/admin/'):
+        g.record_started = recorder.begin_request(request.path)
+
+# after_request hooks run in reverse registration order, so this one sees the
+# response before compress_response encodes it
+@app.after_request
+def record_traffic(response):
+    """Append the finished request to the traffic recording"""
+    started = g.pop('record_started', None)
+    if started is not None:
+        recorder.record(request, response, started)
+    return response
+
+def too_many_sessions():
+    """429 response when the simulated session limit is reached, else None"""
+    if limiter.session_allowed(len(tokens)):
+        return None
+    response = jsonify({"error": "Too many active sessions"})
+    response.status_code = 429
+    response.headers['Retry-After'] = '1'
+    return response
+
 def require_auth(f):
     """Decorator to require valid authentication token"""
     def decorated_function(*args, **kwargs):
@@ -66,6 +535,53 @@ def require_auth(f):
     decorated_function.__name__ = f.__name__
     return decorated_function
 
+def idempotent(f):
+    """Decorator that replays the stored response for a repeated Idempotency-Key"""
+    def decorated_function(*args, **kwargs):
+        key = request.headers.get('Idempotency-Key')
+        if key is None:
+            return f(*args, **kwargs)
+        if not key or len(key) > 255:
+            return jsonify({"error": "Idempotency-Key must be 1-255 characters"}), 400
+        
+        # Keys are scoped to the user; the fingerprint ties a key to one request
+        token = request.headers.get('Authorization', '').split(' ')[-1]
+        scope = (tokens.get(token, {}).get('username'), key)
+        digest = hashlib.sha256(f"{request.method} {request.path}\n".encode('utf-8'))
+        digest.update(request.get_data())
+        
+        cache = current_tenant().idempotency
+        state, entry = cache.begin(scope, digest.hexdigest())
+        if state == REPLAY:
+            status, body, mimetype = entry['response']
+            response = app.response_class(body, status=status, mimetype=mimetype)
+            response.headers['Idempotent-Replayed'] = 'true'
+            return response
+        if state == MISMATCH:
+            return jsonify({"error": "Idempotency-Key was already used for a different request"}), 422
+        if state == IN_PROGRESS:
+            response = jsonify({"error": "A request with this Idempotency-Key is still in progress"})
+            response.status_code = 409
+            response.headers['Retry-After'] = '1'
+            return response
+        
+        try:
+            response = make_response(f(*args, **kwargs))
+        except Exception:
+            cache.release(scope)
+            raise
+        
+        if 200 <= response.status_code < 300:
+            created = response.get_json(silent=True) or {}
+            cache.complete(scope, response.status_code, response.get_data(), response.mimetype,
+                           created.get('id') if isinstance(created, dict) else None)
+        else:
+            cache.release(scope)
+        return response
+    
+    decorated_function.__name__ = f.__name__
+    return decorated_function
+
 @app.route('/Services/REST/v1/login', methods=['GET'])
 def login():
     """Authenticate and return a token"""
@@ -84,6 +600,10 @@ def login():
         if not username or not password:
             return jsonify({"error": "Invalid credentials"}), 401
         
+        rejected = too_many_sessions()
+        if rejected is not None:
+            return rejected
+        
         # Generate token
         token = str(uuid.uuid4())
         expires = datetime.now() + timedelta(hours=1)
@@ -134,7 +654,7 @@ def get_host_records_by_hint():
     
     matching_records = []
     for record_id, record_data in records.items():
-        fqdn = f"{record_data['name']}.{record_data['zone']}"
+        fqdn = record_fqdn(record_data)
         if hint.lower() in fqdn.lower():
             matching_records.append({
                 "id": record_id,
@@ -145,10 +665,9 @@ def get_host_records_by_hint():
 
 @app.route('/Services/REST/v1/addHostRecord', methods=['POST'])
 @require_auth
+@idempotent
 def add_host_record():
     """Create a new host record"""
-    global record_counter
-    
     try:
         data = request.get_json()
         
@@ -169,8 +688,7 @@ def add_host_record():
             return jsonify({"error": "Invalid zone ID"}), 400
         
         # Create record
-        record_counter += 1
-        record_id = record_counter
+        record_id = current_tenant().next_record_id()
         
         record_data = {
             "name": data['name'],
@@ -183,6 +701,7 @@ def add_host_record():
         }
         
         records[record_id] = record_data
+        current_tenant().mark_dirty(data['parentId'], record_id)
         
         return jsonify({"id": record_id, "message": "Record created successfully"}), 201
         
@@ -217,6 +736,7 @@ def update_record():
             record_data['ttl'] = data['ttl']
         
         record_data['updated'] = datetime.now().isoformat()
+        current_tenant().mark_dirty(record_data['parentId'], record_id)
         
         return jsonify({"message": "Record updated successfully"})
         
@@ -240,7 +760,9 @@ def delete_record():
     if object_id not in records:
         return jsonify({"error": "Record not found"}), 404
     
-    del records[object_id]
+    record_data = records.pop(object_id)
+    current_tenant().mark_dirty(record_data['parentId'], object_id)
+    current_tenant().idempotency.forget_record(object_id)
     return jsonify({"message": "Record deleted successfully"})
 
 @app.route('/Services/REST/v1/quickDeploy', methods=['POST'])
@@ -291,6 +813,10 @@ def login_v2():
         if not username or not password:
             return jsonify({"error": "Invalid credentials"}), 401
         
+        rejected = too_many_sessions()
+        if rejected is not None:
+            return rejected
+        
         # Generate token
         token = str(uuid.uuid4())
         expires = datetime.now() + timedelta(hours=1)
@@ -353,6 +879,32 @@ def get_zones_v2():
             })
         return jsonify(zone_list)
 
+@app.route('/api/v2/zones/resolve', methods=['GET'])
+@require_auth
+def resolve_zone_v2():
+    """Resolve an FQDN to its most specific enclosing zone (mock extension)"""
+    fqdn = request.args.get('fqdn', '').strip().rstrip('.').lower()
+    view_filter = request.args.get('view', '')
+    
+    if not fqdn:
+        return jsonify({"error": "fqdn parameter is required"}), 400
+    
+    zone = current_tenant().zone_index.resolve(fqdn, view_filter or None)
+    if zone is None:
+        return jsonify({"error": f"No zone found for {fqdn}"}), 404
+    
+    zone_name = zone['name'].lower()
+    record_name = fqdn[:-len(zone_name) - 1] if fqdn != zone_name else ''
+    
+    return jsonify({
+        "id": zone['id'],
+        "name": zone['name'],
+        "type": zone.get('type', 'Zone'),
+        "view": zone.get('view', 'default'),
+        "fqdn": fqdn,
+        "recordName": record_name
+    })
+
 @app.route('/api/v2/records', methods=['GET'])
 @require_auth
 def get_records_v2():
@@ -369,7 +921,7 @@ def get_records_v2():
         
         # Check name match (FQDN)
         if record_name:
-            fqdn = f"{record_data['name']}.{record_data['zone']}"
+            fqdn = record_fqdn(record_data)
             if fqdn != record_name:
                 continue
         
@@ -379,21 +931,20 @@ def get_records_v2():
         
         matching_records.append({
             "id": record_id,
-            "name": f"{record_data['name']}.{record_data['zone']}",
+            "name": record_fqdn(record_data),
             "type": record_data.get('type', 'HostRecord'),
             "rdata": record_data.get('rdata', ''),
             "ttl": record_data.get('ttl', 3600),
             "zoneId": record_data.get('parentId')
         })
     
-    return jsonify(matching_records)
+    return fast_jsonify(matching_records)
 
 @app.route('/api/v2/records', methods=['POST'])
 @require_auth
+@idempotent
 def create_record_v2():
     """Create a new DNS record (v2 API)"""
-    global record_counter
-    
     try:
         data = request.get_json()
         
@@ -412,8 +963,9 @@ def create_record_v2():
         
         # Extract record name from FQDN
         fqdn = data['name']
-        if fqdn.endswith(f".{zone_name}"):
-            record_name = fqdn[:-len(f".{zone_name}")]
+        zone_fqdn = zones[zone_name]['name']
+        if fqdn.endswith(f".{zone_fqdn}"):
+            record_name = fqdn[:-len(f".{zone_fqdn}")]
         else:
             record_name = fqdn
         
@@ -430,8 +982,7 @@ def create_record_v2():
                 rdata_value = str(rdata_obj)
         
         # Create record
-        record_counter += 1
-        record_id = record_counter
+        record_id = current_tenant().next_record_id()
         
         record_data = {
             "name": record_name,
@@ -444,6 +995,7 @@ def create_record_v2():
         }
         
         records[record_id] = record_data
+        current_tenant().mark_dirty(data['zoneId'], record_id)
         
         return jsonify({
             "id": record_id,
@@ -485,9 +1037,10 @@ def update_record_v2(record_id):
             records[record_id]['type'] = data['type']
         
         records[record_id]['updated'] = datetime.now().isoformat()
+        current_tenant().mark_dirty(records[record_id]['parentId'], record_id)
         
         # Build response
-        fqdn = f"{records[record_id]['name']}.{records[record_id]['zone']}"
+        fqdn = record_fqdn(records[record_id])
         
         return jsonify({
             "id": record_id,
@@ -508,7 +1061,9 @@ def delete_record_v2(record_id):
     if record_id not in records:
         return jsonify({"error": "Record not found"}), 404
     
-    del records[record_id]
+    record_data = records.pop(record_id)
+    current_tenant().mark_dirty(record_data['parentId'], record_id)
+    current_tenant().idempotency.forget_record(record_id)
     return '', 204
 
 @app.route('/api/v2/zones/<int:zone_id>/deploy', methods=['POST'])
@@ -525,11 +1080,9 @@ def deploy_zone_v2(zone_id):
     if not zone_found:
         return jsonify({"error": "Zone not found"}), 404
     
-    return jsonify({
-        "message": f"Zone {zone_id} deployed successfully",
-        "deploymentId": str(uuid.uuid4()),
-        "status": "completed"
-    })
+    job = deployment_queue.submit(current_tenant(), 'FullDeployment', ZONE_DEPLOYMENT_SERVERS, [zone_id])
+    
+    return jsonify(dict(job, message=f"Zone {zone_id} deployment queued")), 202
 
 # --- Services/REST/v2 Aliases (for backward compatibility) ---
 
@@ -606,13 +1159,13 @@ def get_zone_entities_v2(zone_id):
                 "type": record_data['type'],
                 "properties": f"rdata={record_data.get('rdata', '')}|ttl={record_data.get('ttl', '')}"
             })
-    return jsonify({"data": matching_records})
+    return fast_jsonify({"data": matching_records})
 
 @app.route('/api/v2/zones/<int:zone_id>/entities', methods=['POST'])
 @require_auth
+@idempotent
 def add_entity_v2(zone_id):
     """Create a new entity in a zone"""
-    global record_counter
     try:
         data = request.get_json()
         
@@ -623,8 +1176,7 @@ def add_entity_v2(zone_id):
         if not zone_name:
             return jsonify({"error": "Invalid zone ID"}), 400
 
-        record_counter += 1
-        record_id = record_counter
+        record_id = current_tenant().next_record_id()
         
         props = dict(item.split("=") for item in data['properties'].split("|"))
         rdata = props.get('linkedRecordName') or props.get('addresses') or props.get('rdata', '').strip('\\"')
@@ -639,6 +1191,7 @@ def add_entity_v2(zone_id):
             "created": datetime.now().isoformat()
         }
         records[record_id] = record_data
+        current_tenant().mark_dirty(zone_id, record_id)
         
         return jsonify({"id": record_id, "name": data['name'], "type": data['type']}), 201
     except Exception as e:
@@ -660,6 +1213,7 @@ def update_entity_v2(record_id):
         records[record_id]['rdata'] = rdata
         records[record_id]['ttl'] = props.get('ttl', records[record_id]['ttl'])
         records[record_id]['updated'] = datetime.now().isoformat()
+        current_tenant().mark_dirty(records[record_id]['parentId'], record_id)
         
         return jsonify(records[record_id])
     except Exception as e:
@@ -672,7 +1226,9 @@ def delete_entity_v2(record_id):
     if record_id not in records:
         return jsonify({"error": "Record not found"}), 404
     
-    del records[record_id]
+    record_data = records.pop(record_id)
+    current_tenant().mark_dirty(record_data['parentId'], record_id)
+    current_tenant().idempotency.forget_record(record_id)
     return '', 204
 
 @app.route('/api/v2/quickDeploy', methods=['POST'])
@@ -685,11 +1241,12 @@ def quick_deploy_v2():
         if 'entityId' not in data:
             return jsonify({"error": "entityId is required"}), 400
         
-        # Simulate deployment
-        return jsonify({
-            "message": "Configuration deployed successfully",
-            "deploymentId": str(uuid.uuid4())
-        })
+        # Quick deploy pushes the pending changes of the entity's zone to every server
+        entity_id = int(data['entityId'])
+        zone_ids = [entity_id] if any(z['id'] == entity_id for z in zones.values()) else []
+        job = deployment_queue.submit(current_tenant(), 'QuickDeployment', ZONE_DEPLOYMENT_SERVERS, zone_ids)
+        
+        return jsonify(dict(job, message="Configuration deployment queued")), 202
         
     except Exception as e:
         return jsonify({"error": str(e)}), 400
@@ -731,7 +1288,7 @@ def deployments_v2():
             }), 400
         
         # Simulate some environments not supporting DifferentialDeployment
-        if deployment_type == 'DifferentialDeployment':
+        if deployment_type == 'DifferentialDeployment' and REJECT_DIFFERENTIAL:
             return jsonify({
                 "status": 400,
                 "reason": "Bad Request", 
@@ -739,22 +1296,24 @@ def deployments_v2():
                 "message": "The value for field 'type' is not supported for the given resource or collection type"
             }), 400
         
-        print(f"Mock deployment: Type={deployment_type}, Service={service}, Server={server_id}, Entity={entity_id}")
+        job = deployment_queue.submit(current_tenant(), deployment_type, [server_id], [entity_id],
+                                      service=service, serverId=server_id, entityId=entity_id)
         
-        # Simulate deployment success
-        return jsonify({
-            "message": f"Successfully deployed {deployment_type} for {service} service on entity {entity_id} to server {server_id}",
-            "deploymentId": str(uuid.uuid4()),
-            "type": deployment_type,
-            "service": service,
-            "serverId": server_id,
-            "entityId": entity_id,
-            "status": "completed"
-        }), 200
+        return jsonify(dict(job, message=f"Queued {deployment_type} for {service} service on entity {entity_id} to server {server_id}")), 202
         
     except Exception as e:
         return jsonify({"error": str(e)}), 400
 
+@app.route('/api/v2/deployments/<job_id>', methods=['GET'])
+@require_auth
+def get_deployment_v2(job_id):
+    """Get the status of a queued deployment job (v2 API)"""
+    job = current_tenant().deployments.get(job_id)
+    if job is None:
+        return jsonify({"error": "Deployment not found"}), 404
+    
+    return jsonify(dict(job))
+
 @app.route('/api/v2/sessions/<token>', methods=['DELETE'])
 @require_auth
 def delete_session_v2(token):
@@ -795,11 +1354,222 @@ def health_check():
 @app.route('/debug/records', methods=['GET'])
 def debug_records():
     """Debug endpoint to view all records"""
-    return jsonify({
-        "records": records,
-        "zones": zones
+    tenant = current_tenant()
+    return fast_jsonify({
+        "records": tenant.records,
+        "zones": tenant.zones
     })
 
+@app.route('/admin/profiling', methods=['GET'])
+def get_profiling():
+    """Show profiling configuration and counters"""
+    return jsonify(profiler.status())
+
+@app.route('/admin/profiling', methods=['POST'])
+def start_profiling_admin():
+    """Enable profiling for requests whose path matches a route pattern"""
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        profiler.start(
+            mode=data.get('mode', 'deterministic'),
+            route=data.get('route', '.*'),
+            interval_ms=data.get('interval_ms', 5)
+        )
+    except (ValueError, TypeError, re.error) as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(profiler.status())
+
+@app.route('/admin/profiling', methods=['DELETE'])
+def stop_profiling_admin():
+    """Disable profiling; collected data stays available for download"""
+    profiler.stop()
+    return jsonify(profiler.status())
+
+@app.route('/admin/limits', methods=['GET'])
+def get_limits():
+    """Show the simulated load limits, peak concurrency and rejection counters"""
+    return jsonify(limiter.status())
+
+@app.route('/admin/limits', methods=['POST'])
+def set_limits():
+    """Change the simulated load limits (0 disables one); resets the counters"""
+    data = request.get_json(silent=True) or {}
+    
+    try:
+        limiter.configure(
+            max_inflight=data.get('max_inflight', 0),
+            rate=data.get('rate', 0),
+            burst=data.get('burst'),
+            max_sessions=data.get('max_sessions', 0)
+        )
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(limiter.status())
+
+@app.route('/admin/limits', methods=['DELETE'])
+def reset_limit_stats():
+    """Reset the counters, keeping the limits"""
+    limiter.reset_stats()
+    return jsonify(limiter.status())
+
+@app.route('/admin/recording', methods=['GET'])
+def get_recording():
+    """Show traffic recording configuration and counters"""
+    return jsonify(recorder.status())
+
+@app.route('/admin/recording', methods=['POST'])
+def start_recording_admin():
+    """Start recording matching requests to a trace file (replay with replay.py)"""
+    data = request.get_json(silent=True) or {}
+    if not data.get('path'):
+        return jsonify({"error": "path is required"}), 400
+    
+    try:
+        recorder.start(data['path'], route=data.get('route', DEFAULT_RECORD_ROUTE))
+    except (OSError, TypeError, re.error) as e:
+        return jsonify({"error": str(e)}), 400
+    
+    return jsonify(recorder.status())
+
+@app.route('/admin/recording', methods=['DELETE'])
+def stop_recording_admin():
+    """Stop recording and close the trace file"""
+    recorder.stop()
+    return jsonify(recorder.status())
+
+@app.route('/admin/profiling/profile.pstats', methods=['GET'])
+def download_pstats():
+    """Download the merged deterministic profile (load with pstats.Stats)"""
+    data = profiler.pstats_bytes()
+    if data is None:
+        return jsonify({"error": "No deterministic profile collected"}), 404
+    
+    response = make_response(data)
+    response.headers['Content-Type'] = 'application/octet-stream'
+    response.headers['Content-Disposition'] = 'attachment; filename=profile.pstats'
+    return response
+
+@app.route('/admin/profiling/stacks.txt', methods=['GET'])
+def download_collapsed_stacks():
+    """Download sampled stacks in collapsed format (flamegraph.pl, speedscope)"""
+    data = profiler.collapsed_stacks()
+    if data is None:
+        return jsonify({"error": "No stack samples collected"}), 404
+    
+    response = make_response(data)
+    response.headers['Content-Type'] = 'text/plain; charset=utf-8'
+    response.headers['Content-Disposition'] = 'attachment; filename=stacks.txt'
+    return response
+
+@app.route('/admin/tenants', methods=['GET'])
+def list_tenants():
+    """List tenant namespaces"""
+    return jsonify([tenant.summary() for tenant in list(tenants.values())])
+
+@app.route('/admin/tenants', methods=['POST'])
+def create_tenant():
+    """Create a tenant namespace, optionally bulk-seeded with synthetic data"""
+    data = request.get_json(silent=True) or {}
+    name = data.get('name', '')
+    
+    if not TENANT_NAME_PATTERN.match(name):
+        return jsonify({"error": "Invalid tenant name (letters, digits, '_', '.', '-'; max 64)"}), 400
+    
+    tenant = Tenant(name)
+    with tenants_lock:
+        if name in tenants:
+            return jsonify({"error": f"Tenant already exists: {name}"}), 409
+        tenants[name] = tenant
+    
+    if data.get('seed_zones'):
+        dataset = Dataset(int(data['seed_zones']), int(data.get('seed_records', 0)),
+                          seed=int(data.get('seed', 42)),
+                          first_zone_id=max(z['id'] for z in tenant.zones.values()) + 1)
+        load_dataset(dataset, tenant)
+    
+    return jsonify(tenant.summary()), 201
+
+@app.route('/admin/tenants/<name>/zones/<zone_name>/zonefile', methods=['POST'])
+def import_zone_file_admin(name, zone_name):
+    """Bulk-load a zone file (request body, optionally gzip-encoded) into a zone"""
+    tenant = tenants.get(name)
+    if tenant is None:
+        return jsonify({"error": f"Unknown tenant: {name}"}), 404
+    
+    stream = request.stream
+    if request.headers.get('Content-Encoding', '').lower() == 'gzip':
+        stream = gzip.GzipFile(fileobj=stream, mode='rb')
+    else:
+        stream = io.BufferedReader(stream)
+    lines = io.TextIOWrapper(stream, encoding='utf-8', errors='replace')
+    
+    replace = request.args.get('replace', '').lower() in ('1', 'true', 'yes')
+    try:
+        zone, stats = import_zone_file(lines, zone_name, tenant, view=request.args.get('view'),
+                                       replace=replace)
+    except ZoneFileError as e:
+        return jsonify({"error": str(e), "line": e.line}), 400
+    except (OSError, EOFError) as e:
+        return jsonify({"error": f"Could not read request body: {e}"}), 400
+    
+    return jsonify(dict(stats.as_dict(), zone=zone)), 201
+
+@app.route('/admin/tenants/<name>/zones/<zone_name>/zonefile', methods=['GET'])
+def export_zone_file_admin(name, zone_name):
+    """Stream a zone's records out as an RFC 1035 zone file"""
+    tenant = tenants.get(name)
+    if tenant is None:
+        return jsonify({"error": f"Unknown tenant: {name}"}), 404
+    
+    _, zone = tenant.find_zone(zone_name, request.args.get('view'))
+    if zone is None:
+        return jsonify({"error": f"Zone not found: {zone_name}"}), 404
+    
+    zone_id = zone['id']
+    zone_records = (r for r in list(tenant.records.values()) if r['parentId'] == zone_id)
+    lines = write_zone_file(zone['name'], zone_records,
+                            header=f"zone {zone['name']} (view {zone.get('view')}) exported from the mock BlueCat API server")
+    
+    def chunks():
+        # One write per line is slow on the development server; send ~64 KiB at a time
+        buffer, size = [], 0
+        for line in lines:
+            buffer.append(line)
+            size += len(line)
+            if size >= 65536:
+                yield ''.join(buffer)
+                buffer, size = [], 0
+        yield ''.join(buffer)
+    
+    response = app.response_class(stream_with_context(chunks()), mimetype='text/dns')
+    response.headers['Content-Disposition'] = f"attachment; filename={zone['name']}.zone"
+    return response
+
+@app.route('/admin/tenants/<name>/reset', methods=['POST'])
+def reset_tenant(name):
+    """Reset a tenant to its initial state"""
+    tenant = tenants.get(name)
+    if tenant is None:
+        return jsonify({"error": f"Unknown tenant: {name}"}), 404
+    
+    tenant.reset()
+    return jsonify(tenant.summary())
+
+@app.route('/admin/tenants/<name>', methods=['DELETE'])
+def drop_tenant(name):
+    """Drop a tenant namespace and all of its data"""
+    if name == DEFAULT_TENANT:
+        return jsonify({"error": "The default tenant cannot be dropped"}), 400
+    
+    with tenants_lock:
+        if tenants.pop(name, None) is None:
+            return jsonify({"error": f"Unknown tenant: {name}"}), 404
+    
+    return '', 204
+
 # Deployment endpoints for v2 API
 @app.route('/api/v2/zones/<int:zone_id>/deploymentRoles', methods=['GET'])
 @require_auth
@@ -838,6 +1608,23 @@ def get_zone_deployment_roles(zone_id):
         }
     ]), 200
 
+@app.route('/api/v2/zones/<int:zone_id>/pendingChanges', methods=['GET'])
+@require_auth
+def get_zone_pending_changes(zone_id):
+    """Get the number of records changed since the last deployment, per server (mock extension)"""
+    if not any(zdata['id'] == zone_id for zdata in zones.values()):
+        return jsonify({"error": "Zone not found"}), 404
+    
+    server_id = request.args.get('serverId')
+    server_ids = [int(server_id)] if server_id else ZONE_DEPLOYMENT_SERVERS
+    
+    tenant = current_tenant()
+    pending = [{"serverId": sid, "pendingChanges": tenant.pending_changes(zone_id, sid)}
+               for sid in server_ids]
+    if server_id:
+        return jsonify(dict(pending[0], zoneId=zone_id))
+    return jsonify({"zoneId": zone_id, "servers": pending})
+
 @app.route('/api/v2/servers', methods=['GET'])
 @require_auth
 def get_servers_v2():
@@ -920,18 +1707,85 @@ def deploy_dns_service(server_id):
         # If JSON parsing fails, treat as empty deployment request
         deployment_data = {}
     
-    return jsonify({
-        "deploymentId": str(uuid.uuid4()),
-        "serverId": server_id,
-        "serverName": server_name,
-        "service": "DNS",
-        "status": "completed",
-        "message": f"DNS service deployed successfully to {server_name}",
-        "timestamp": datetime.utcnow().isoformat() + "Z",
-        "options": deployment_data
-    }), 200
+    zone_ids = [zdata['id'] for zdata in list(zones.values())]
+    job = deployment_queue.submit(current_tenant(), 'FullDeployment', [server_id], zone_ids,
+                                  serverId=server_id, serverName=server_name, service="DNS",
+                                  options=deployment_data)
+    
+    return jsonify(dict(job,
+                        message=f"DNS service deployment to {server_name} queued",
+                        timestamp=datetime.utcnow().isoformat() + "Z")), 202
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Mock BlueCat API server")
+    parser.add_argument('--host', default='0.0.0.0', help="interface to listen on")
+    parser.add_argument('--port', type=int, default=5001, help="port to listen on")
+    parser.add_argument('--seed-zones', type=int, default=0,
+                        help="number of synthetic zones to bulk-load at startup")
+    parser.add_argument('--seed-records', type=int, default=0,
+                        help="records per synthetic zone")
+    parser.add_argument('--seed-views', default=','.join(DEFAULT_VIEWS),
+                        help="comma-separated views to spread synthetic zones across")
+    parser.add_argument('--seed', type=int, default=42, help="random seed for the synthetic dataset")
+    parser.add_argument('--reject-differential', action='store_true',
+                        help="reject DifferentialDeployment like appliances that do not support it")
+    parser.add_argument('--deploy-workers', type=int, default=4,
+                        help="deployment jobs that can run concurrently (one per server at a time)")
+    parser.add_argument('--deploy-seconds', type=float, default=0.2,
+                        help="simulated base duration of each deployment job")
+    parser.add_argument('--deploy-seconds-per-record', type=float, default=0.0,
+                        help="additional simulated duration per record shipped")
+    parser.add_argument('--zone-file', action='append', default=[], metavar='ZONE=PATH',
+                        help="bulk-load an RFC 1035 zone file into ZONE at startup (repeatable)")
+    parser.add_argument('--zone-file-view', default='default',
+                        help="view for zones created by --zone-file")
+    parser.add_argument('--idempotency-ttl', type=float, default=IdempotencyCache.ttl,
+                        help="seconds a stored Idempotency-Key response is replayed for")
+    parser.add_argument('--idempotency-max-keys', type=int, default=IdempotencyCache.max_keys,
+                        help="Idempotency-Key responses kept per tenant (oldest evicted first)")
+    parser.add_argument('--max-inflight', type=int, default=0,
+                        help="answer 503 to API requests beyond this many concurrent ones")
+    parser.add_argument('--rate-limit', type=float, default=0.0,
+                        help="answer 429 to API requests beyond this many per second")
+    parser.add_argument('--rate-burst', type=float, default=None,
+                        help="requests allowed in a burst under --rate-limit (default: one second's worth)")
+    parser.add_argument('--max-sessions', type=int, default=0,
+                        help="answer 429 to logins beyond this many active sessions")
+    parser.add_argument('--record', metavar='PATH',
+                        help="record redacted API traffic to a trace file (.gz to compress)")
+    args = parser.parse_args()
+    REJECT_DIFFERENTIAL = args.reject_differential
+    deployment_queue.configure(args.deploy_workers, args.deploy_seconds, args.deploy_seconds_per_record)
+    IdempotencyCache.ttl = args.idempotency_ttl
+    IdempotencyCache.max_keys = args.idempotency_max_keys
+    limiter.configure(args.max_inflight, args.rate_limit, args.rate_burst, args.max_sessions)
+    
+    if args.seed_zones:
+        started = time.perf_counter()
+        dataset = Dataset(args.seed_zones, args.seed_records,
+                          views=args.seed_views.split(','), seed=args.seed,
+                          first_zone_id=max(z['id'] for z in zones.values()) + 1)
+        load_dataset(dataset)
+        print(f"Loaded {len(dataset.zones)} zones and {len(records)} records "
+              f"in {time.perf_counter() - started:.1f}s")
+    
+    for spec in args.zone_file:
+        origin, _, path = spec.partition('=')
+        if not path:
+            parser.error(f"--zone-file expects ZONE=PATH, got: {spec}")
+        started = time.perf_counter()
+        try:
+            with open(path, encoding='utf-8', errors='replace') as zone_file:
+                zone, stats = import_zone_file(zone_file, origin, view=args.zone_file_view)
+        except (OSError, ZoneFileError) as e:
+            parser.error(f"{path}: {e}")
+        print(f"Loaded {stats.records} records into {zone['name']} (id {zone['id']}) "
+              f"from {path} in {time.perf_counter() - started:.1f}s")
+    
+    if args.record:
+        recorder.start(args.record)
+        print(f"Recording API traffic to {args.record}")
+    
     print("Starting BlueCat Mock Server...")
     print("Available endpoints:")
     print("  GET  /Services/REST/v1/login")
@@ -946,6 +1800,7 @@ if __name__ == '__main__':
     print("  POST /api/v2/sessions")
     print("  DELETE /api/v2/sessions/<token>")
     print("  GET  /api/v2/zones?name={zone}")
+    print("  GET  /api/v2/zones/resolve?fqdn={fqdn}&view={view}")
     print("  GET  /api/v2/records?zone={id}&name={fqdn}&type={type}")
     print("  POST /api/v2/records")
     print("  PUT  /api/v2/records/<record_id>")
@@ -953,6 +1808,9 @@ if __name__ == '__main__':
     print("  POST /api/v2/zones/<zone_id>/deploy")
     print("\n--- V2 Deployment Endpoints ---")
     print("  GET  /api/v2/zones/<zone_id>/deploymentRoles")
+    print("  GET  /api/v2/zones/<zone_id>/pendingChanges?serverId={id}")
+    print("  POST /api/v2/deployments")
+    print("  GET  /api/v2/deployments/<deployment_id>")
     print("  GET  /api/v2/servers?type=DNS")
     print("  GET  /api/v2/deployment/options")
     print("  POST /api/v2/servers/<server_id>/services/DNS/deploy")
@@ -973,8 +1831,23 @@ if __name__ == '__main__':
     print("\n--- Debug Endpoints ---")
     print("  GET  /health")
     print("  GET  /debug/records")
+    print("\n--- Admin Endpoints ---")
+    print("  GET|POST|DELETE /admin/profiling")
+    print("  GET  /admin/profiling/profile.pstats")
+    print("  GET  /admin/profiling/stacks.txt")
+    print("  GET|POST|DELETE /admin/limits")
+    print("  GET|POST|DELETE /admin/recording")
+    print("  GET|POST /admin/tenants")
+    print("  POST /admin/tenants/<name>/reset")
+    print("  GET|POST /admin/tenants/<name>/zones/<zone>/zonefile")
+    print("  DELETE /admin/tenants/<name>")
+    print("\nAny endpoint can be scoped to a tenant with the /tenants/<name> prefix")
+    print("or the X-Mock-Tenant header")
     print("")
     print("Use any username/password for authentication")
-    print("Server running on http://localhost:5001")
+    print(f"Server running on http://localhost:{args.port}")
     
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    # The reloader restarts the process, which would discard (and regenerate) seeded or imported
+    # data and truncate the trace file
+    app.run(host=args.host, port=args.port, debug=True,
+            use_reloader=not (args.seed_zones or args.zone_file or args.record))
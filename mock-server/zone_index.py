@@ -0,0 +1,52 @@
+"""
+Longest-suffix zone index for the mock BlueCat API server.
+
+Zones are stored in a trie keyed by reversed DNS labels (com -> example -> www),
+so resolving an FQDN to its most specific enclosing zone walks one node per label
+instead of scanning every zone. Each node can hold one zone per view, which keeps
+split-horizon zones (same name in internal/external views) apart.
+"""
+
+
+class _Node:
+    __slots__ = ('children', 'zones')
+
+    def __init__(self):
+        self.children = {}
+        self.zones = {}
+
+
+def _labels(name):
+    """Return the labels of a DNS name, most significant first"""
+    name = name.strip().rstrip('.').lower()
+    return reversed(name.split('.')) if name else iter(())
+
+
+class ZoneIndex:
+    """Reverse-label suffix trie mapping FQDNs to their enclosing zone per view"""
+
+    def __init__(self, zones=()):
+        self._root = _Node()
+        for zone in zones:
+            self.add(zone)
+
+    def add(self, zone):
+        """Index a zone dict (needs "name"; "view" defaults to "default")"""
+        node = self._root
+        for label in _labels(zone['name']):
+            node = node.children.setdefault(label, _Node())
+        node.zones[zone.get('view', 'default')] = zone
+
+    def resolve(self, fqdn, view=None):
+        """Return the most specific zone enclosing fqdn (in view, if given), or None"""
+        best = None
+        node = self._root
+        for label in _labels(fqdn):
+            node = node.children.get(label)
+            if node is None:
+                break
+            if view:
+                best = node.zones.get(view, best)
+            elif node.zones:
+                best = next(iter(node.zones.values()))
+        return best
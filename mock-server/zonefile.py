@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Streaming RFC 1035 zone-file reader and writer for the mock BlueCat API server.
+
+parse_zone_file() reads master-file lines one at a time and yields one record at
+a time, so a zone of any size is loaded in a single pass while holding only the
+current logical line. It understands $ORIGIN, $TTL, "@", relative and absolute
+owner names, blank owners (repeat the previous one), optional TTL and class in
+either order, TTL units (1h30m), comments, parenthesised multi-line records and
+quoted TXT strings with escapes. A/AAAA/CNAME/TXT records are yielded; other
+types (SOA, NS, MX, ...) are counted in ZoneFileStats.skipped.
+
+write_zone_file() is the reverse: it yields zone-file lines for an iterable of
+records in the mock store's shape.
+
+Used by server.py (--zone-file and /admin/tenants/<name>/zones/<zone>/zonefile) or
+standalone to check a file (add --export to re-emit it):
+
+    python zonefile.py example.com db.example.com
+"""
+
+import argparse
+import ipaddress
+import re
+import sys
+from collections import Counter
+
+SUPPORTED_TYPES = ('A', 'AAAA', 'CNAME', 'TXT')
+CLASSES = ('IN', 'CH', 'HS', 'CS')
+DEFAULT_TTL = 3600
+TXT_CHUNK = 255
+
+_TTL_PATTERN = re.compile(r'^(?:\d+[smhdw])*\d+[smhdw]?$', re.IGNORECASE)
+_TTL_PART = re.compile(r'(\d+)([smhdw]?)', re.IGNORECASE)
+_SPECIAL_CHARS = re.compile(r'[";()\\]')
+_TTL_UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+class ZoneFileError(ValueError):
+    """A zone file could not be parsed; carries the 1-based line number"""
+
+    def __init__(self, message, line=None):
+        super().__init__(f"line {line}: {message}" if line else message)
+        self.line = line
+
+
+class ZoneFileStats:
+    """Counters filled in while a zone file is parsed"""
+
+    def __init__(self):
+        self.records = 0
+        self.lines = 0
+        self.skipped = Counter()
+        self.out_of_zone = 0
+
+    def as_dict(self):
+        return {
+            "records": self.records,
+            "lines": self.lines,
+            "skipped": dict(self.skipped),
+            "out_of_zone": self.out_of_zone
+        }
+
+
+def _is_ttl(token):
+    return bool(_TTL_PATTERN.match(token))
+
+
+def _parse_ttl(token, line):
+    if not _is_ttl(token):
+        raise ZoneFileError(f"invalid TTL: {token}", line)
+    return sum(int(n) * _TTL_UNITS[unit.lower()] for n, unit in _TTL_PART.findall(token))
+
+
+def _unescape(text, line):
+    """Resolve \\X and \\DDD escapes inside a character string"""
+    if '\\' not in text:
+        return text
+    out = []
+    i = 0
+    while i < len(text):
+        char = text[i]
+        if char == '\\':
+            if text[i + 1:i + 4].isdigit() and len(text[i + 1:i + 4]) == 3:
+                out.append(chr(int(text[i + 1:i + 4])))
+                i += 4
+                continue
+            if i + 1 >= len(text):
+                raise ZoneFileError("dangling escape", line)
+            out.append(text[i + 1])
+            i += 2
+            continue
+        out.append(char)
+        i += 1
+    return ''.join(out)
+
+
+def _tokenize(text, line, depth):
+    """Split one physical line into (token, quoted) pairs; returns (tokens, depth)"""
+    if not _SPECIAL_CHARS.search(text):
+        # Most lines are plain "name ttl class type value"
+        return [(token, False) for token in text.split()], depth
+
+    tokens = []
+    i = 0
+    length = len(text)
+    while i < length:
+        char = text[i]
+        if char in ' \t\r\n':
+            i += 1
+        elif char == ';':
+            break
+        elif char == '(':
+            depth += 1
+            i += 1
+        elif char == ')':
+            if depth == 0:
+                raise ZoneFileError("unbalanced ')'", line)
+            depth -= 1
+            i += 1
+        elif char == '"':
+            j = i + 1
+            while j < length and text[j] != '"':
+                j += 2 if text[j] == '\\' else 1
+            if j >= length:
+                raise ZoneFileError("unterminated quoted string", line)
+            tokens.append((_unescape(text[i + 1:j], line), True))
+            i = j + 1
+        else:
+            j = i
+            while j < length and text[j] not in ' \t\r\n;()"':
+                j += 2 if text[j] == '\\' else 1
+            tokens.append((text[i:j], False))
+            i = j
+    return tokens, depth
+
+
+def _logical_lines(lines):
+    """Yield (line number, starts with blank, tokens), joining parenthesised lines"""
+    tokens = []
+    depth = 0
+    first_line = 0
+    indented = False
+    for number, text in enumerate(lines, start=1):
+        if depth == 0:
+            first_line = number
+            indented = text[:1] in (' ', '\t')
+        line_tokens, depth = _tokenize(text, number, depth)
+        tokens.extend(line_tokens)
+        if depth == 0 and tokens:
+            yield first_line, indented, tokens
+            tokens = []
+    if depth:
+        raise ZoneFileError("unbalanced '(' at end of file", first_line)
+
+
+def _absolute(name, origin):
+    """Resolve a (possibly relative) domain name against the origin; no trailing dot"""
+    if name == '@':
+        return origin
+    if name.endswith('.'):
+        return name[:-1]
+    return f"{name}.{origin}" if origin else name
+
+
+def parse_zone_file(lines, origin, default_ttl=None, stats=None):
+    """
+    Yield {"name", "type", "rdata", "ttl"} dicts for the A/AAAA/CNAME/TXT records in
+    a zone file. lines is any iterable of text lines (an open file streams). Names
+    are relative to origin, and apex records are named after the zone itself (as the
+    v2 API stores them); records outside origin are skipped.
+    """
+    zone = origin.rstrip('.')
+    zone_lower = zone.lower()
+    suffix = '.' + zone_lower
+    current_origin = zone
+    ttl_default = default_ttl
+    last_ttl = None
+    owner = None
+    stats = stats if stats is not None else ZoneFileStats()
+
+    for number, indented, tokens in _logical_lines(lines):
+        stats.lines = number
+        first, first_quoted = tokens[0]
+
+        if not first_quoted and first.startswith('$'):
+            directive = first.upper()
+            if directive == '$ORIGIN' and len(tokens) >= 2:
+                current_origin = _absolute(tokens[1][0], current_origin)
+            elif directive == '$TTL' and len(tokens) >= 2:
+                ttl_default = _parse_ttl(tokens[1][0], number)
+            else:
+                raise ZoneFileError(f"unsupported directive: {first}", number)
+            continue
+
+        position = 0
+        if not indented:
+            owner = _absolute(first, current_origin)
+            position = 1
+        elif owner is None:
+            raise ZoneFileError("record without an owner name", number)
+
+        ttl = None
+        while position < len(tokens):
+            token = tokens[position][0]
+            if ttl is None and _is_ttl(token):
+                ttl = _parse_ttl(token, number)
+            elif token.upper() in CLASSES:
+                pass
+            else:
+                break
+            position += 1
+
+        if position >= len(tokens):
+            raise ZoneFileError("missing record type", number)
+        record_type = tokens[position][0].upper()
+        rdata = tokens[position + 1:]
+
+        if ttl is None:
+            ttl = ttl_default if ttl_default is not None else last_ttl
+        if ttl is None:
+            ttl = DEFAULT_TTL
+        last_ttl = ttl
+
+        if record_type not in SUPPORTED_TYPES:
+            stats.skipped[record_type] += 1
+            continue
+
+        owner_lower = owner.lower()
+        if owner_lower == zone_lower:
+            name = zone
+        elif owner_lower.endswith(suffix):
+            name = owner[:-len(suffix)]
+        else:
+            stats.out_of_zone += 1
+            continue
+
+        if not rdata:
+            raise ZoneFileError(f"missing {record_type} data", number)
+        if record_type == 'TXT':
+            value = ''.join(text for text, _ in rdata)
+        elif len(rdata) != 1:
+            raise ZoneFileError(f"{record_type} takes one value", number)
+        elif record_type == 'CNAME':
+            value = _absolute(rdata[0][0], current_origin)
+        else:
+            value = rdata[0][0]
+            try:
+                if record_type == 'A':
+                    ipaddress.IPv4Address(value)
+                else:
+                    ipaddress.IPv6Address(value)
+            except ValueError:
+                raise ZoneFileError(f"invalid {record_type} address: {value}", number)
+
+        stats.records += 1
+        yield {"name": name, "type": record_type, "rdata": value, "ttl": ttl}
+
+
+def _quote_txt(text):
+    """Render TXT data as one or more quoted character strings"""
+    escaped = []
+    for start in range(0, len(text), TXT_CHUNK):
+        chunk = text[start:start + TXT_CHUNK].replace('\\', '\\\\').replace('"', '\\"')
+        escaped.append(f'"{chunk}"')
+    return ' '.join(escaped) or '""'
+
+
+def write_zone_file(origin, records, default_ttl=DEFAULT_TTL, header=None):
+    """Yield zone-file lines for records ({"name", "type", "rdata", "ttl"} dicts)"""
+    zone = origin.rstrip('.')
+    if header:
+        yield f"; {header}\n"
+    yield f"$ORIGIN {zone}.\n"
+    yield f"$TTL {default_ttl}\n"
+
+    suffix = '.' + zone
+    for record in records:
+        name = record['name']
+        if name == zone or not name:
+            name = '@'
+        elif name.endswith(suffix):
+            name = name[:-len(suffix)]
+
+        record_type = record['type']
+        rdata = str(record['rdata'])
+        if record_type == 'TXT':
+            rdata = _quote_txt(rdata)
+        elif record_type == 'CNAME' and not rdata.endswith('.'):
+            rdata += '.'
+
+        ttl = record.get('ttl', default_ttl)
+        ttl_field = '' if ttl == default_ttl else f"{ttl} "
+        yield f"{name} {ttl_field}IN {record_type} {rdata}\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parse a zone file and print a summary, or re-export it")
+    parser.add_argument('origin', help="zone name the file belongs to")
+    parser.add_argument('path', nargs='?', default='-', help="zone file (default: stdin)")
+    parser.add_argument('--export', action='store_true', help="write the parsed records back out as a zone file")
+    args = parser.parse_args()
+
+    stream = sys.stdin if args.path == '-' else open(args.path, encoding='utf-8', errors='replace')
+    stats = ZoneFileStats()
+    try:
+        parsed = parse_zone_file(stream, args.origin, stats=stats)
+        if args.export:
+            sys.stdout.writelines(write_zone_file(args.origin, parsed))
+        else:
+            for _ in parsed:
+                pass
+    except ZoneFileError as e:
+        sys.exit(f"{args.path}: {e}")
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    print(stats.as_dict(), file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,356 @@
+#!/bin/bash
+# Shared helpers for manage_record.sh and delete_record.sh
+# Callers set BASE_API_URL, auth_header, zone_id, DIFFERENTIAL_THRESHOLD and
+# DEPLOY_TIMEOUT before use, and call governor_init once API_URL is known.
+
+# --- Timing ---
+# Phase durations (milliseconds) accumulate in TIMING_<phase> and are reported in
+# the result JSON. When TRACE_FILE is set, each phase is also appended to it as one
+# JSON line, so concurrent runs can share a file.
+
+TIMING_PHASES="auth zone_lookup record_lookup write deploy_discovery deploy"
+TIMING_DEPLOY_SERVERS=""
+TRACE_SCRIPT="$(basename "$0" .sh)"
+
+# Current time in milliseconds (whole seconds where date has no %N, e.g. macOS)
+now_ms() {
+    local now
+    now=$(date +%s%N)
+    case "$now" in
+        *N) echo $(( ${now%N} * 1000 )) ;;
+        *) echo $(( now / 1000000 )) ;;
+    esac
+}
+
+SCRIPT_STARTED_MS=$(now_ms)
+
+# API calls go through gcurl, which shares an in-flight cap and rate budget with
+# the other script processes of the run
+source "$(dirname "${BASH_SOURCE[0]}")/governor.sh"
+
+phase_start() {
+    PHASE_STARTED_MS=$(now_ms)
+}
+
+# End the phase begun by phase_start, adding its duration to TIMING_<phase>
+phase_end() {
+    local phase="$1"
+    local var="TIMING_$phase"
+    local elapsed=$(( $(now_ms) - PHASE_STARTED_MS ))
+
+    printf -v "$var" '%s' $(( ${!var:-0} + elapsed ))
+    trace_event "$phase" "$elapsed"
+}
+
+# Record how long one server's deployment took, from submission to its final status
+server_deploy_done() {
+    local server_id="$1"
+    local elapsed=$(( $(now_ms) - $2 ))
+
+    TIMING_DEPLOY_SERVERS="${TIMING_DEPLOY_SERVERS:+$TIMING_DEPLOY_SERVERS,}$server_id:$elapsed"
+    trace_event "deploy_server" "$elapsed" "$server_id"
+}
+
+# Append a phase (name, milliseconds, optional server id) to TRACE_FILE
+trace_event() {
+    local server=""
+
+    if [ -z "$TRACE_FILE" ]; then
+        return 0
+    fi
+    if [ -n "$3" ]; then
+        server=",\"server_id\":\"$3\""
+    fi
+    printf '{"ts":%s,"script":"%s","fqdn":"%s","phase":"%s","ms":%s%s}\n' \
+        "$(now_ms)" "$TRACE_SCRIPT" "$FQDN" "$1" "$2" "$server" >> "$TRACE_FILE" 2>/dev/null || true
+}
+
+# Timing fields for the result JSON, as a fragment starting with a comma. Also
+# traces the total run time.
+timing_json() {
+    local phase var fields=""
+    local total=$(( $(now_ms) - SCRIPT_STARTED_MS ))
+
+    trace_event "total" "$total"
+    for phase in $TIMING_PHASES; do
+        var="TIMING_$phase"
+        fields="$fields,\"timing_${phase}_ms\":\"${!var:-0}\""
+    done
+    printf '%s,"timing_deploy_servers":"%s","timing_total_ms":"%s"' "$fields" "$TIMING_DEPLOY_SERVERS" "$total"
+}
+
+# --- Idempotency ---
+
+# Deterministic Idempotency-Key for a request payload: retrying the same create
+# (after a timeout, or from a parallel run) replays the first result instead of
+# creating a duplicate record
+idempotency_key() {
+    local digest
+    digest=$(printf '%s' "$1" | sha256sum 2>/dev/null | cut -d' ' -f1 || true)
+    if [ -z "$digest" ]; then
+        digest=$(printf '%s' "$1" | shasum -a 256 | cut -d' ' -f1)
+    fi
+    echo "tf-bluecat-$digest"
+}
+
+# --- Deployment ---
+
+# Pick the deployment type for one server; sets DEPLOY_TYPE. A DifferentialDeployment
+# only ships the records changed since the zone was last deployed, so it is used while
+# the pending change set is at or below DIFFERENTIAL_THRESHOLD (0 disables it). The
+# count comes from GET /zones/<id>/pendingChanges, which only the mock server offers:
+# when it cannot be read a FullDeployment is used, and the endpoint is not asked again
+# for the other servers.
+PENDING_CHANGES_UNAVAILABLE=""
+
+choose_deployment_type() {
+    local server_id="$1"
+    local pending=""
+
+    DEPLOY_TYPE="FullDeployment"
+    if [ -z "$DIFFERENTIAL_THRESHOLD" ] || [ "$DIFFERENTIAL_THRESHOLD" -le 0 ] 2>/dev/null; then
+        return
+    fi
+    if [ -n "$PENDING_CHANGES_UNAVAILABLE" ]; then
+        return
+    fi
+
+    pending=$(gcurl -s -X GET "$BASE_API_URL/zones/$zone_id/pendingChanges?serverId=$server_id" -H "$auth_header" \
+        | grep -o '"pendingChanges"[[:space:]]*:[[:space:]]*[0-9]*' | grep -o '[0-9]*$' || true)
+    if [ -z "$pending" ]; then
+        echo "Pending changes not reported by the appliance, using FullDeployment" >&2
+        PENDING_CHANGES_UNAVAILABLE=1
+        return
+    fi
+
+    echo "Server $server_id: $pending pending change(s) in zone $zone_id" >&2
+    if [ "$pending" -le "$DIFFERENTIAL_THRESHOLD" ]; then
+        DEPLOY_TYPE="DifferentialDeployment"
+    fi
+}
+
+# POST one deployment request. Sets DEPLOY_HTTP_CODE and DEPLOY_BODY.
+post_deployment() {
+    local server_id="$1"
+    local deploy_type="$2"
+    local result
+
+    result=$(gcurl -s -w "\nHTTP_CODE:%{http_code}" \
+        -X POST "$BASE_API_URL/deployments" \
+        -H "$auth_header" \
+        -H "Content-Type: application/json" \
+        -d "{\"type\":\"$deploy_type\",\"service\":\"DNS\",\"serverId\":$server_id,\"entityId\":$zone_id}")
+
+    DEPLOY_HTTP_CODE=$(echo "$result" | grep "HTTP_CODE:" | sed 's/HTTP_CODE://')
+    DEPLOY_BODY=$(echo "$result" | sed '/HTTP_CODE:/d')
+}
+
+# Deploy the zone to one server. Sets DEPLOY_TYPE, DEPLOY_HTTP_CODE and DEPLOY_BODY.
+# Falls back to a FullDeployment when the appliance rejects a differential one.
+deploy_zone_to_server() {
+    local server_id="$1"
+
+    choose_deployment_type "$server_id"
+    echo "Deploying zone $zone_id to server $server_id ($DEPLOY_TYPE)..." >&2
+    post_deployment "$server_id" "$DEPLOY_TYPE"
+
+    if [ "$DEPLOY_TYPE" = "DifferentialDeployment" ] && [ "$DEPLOY_HTTP_CODE" = "400" ]; then
+        echo "DifferentialDeployment rejected by server $server_id, retrying with FullDeployment" >&2
+        DEPLOY_TYPE="FullDeployment"
+        post_deployment "$server_id" "$DEPLOY_TYPE"
+    fi
+}
+
+# --- Deployment jobs ---
+# Deployments are submitted to every server first and then polled together, so the
+# servers deploy in parallel instead of one blocking call after another.
+
+PENDING_DEPLOYMENTS=""
+DEPLOYED_SERVERS=""
+FAILED_SERVERS=""
+
+# Extract a deployment's status ("status" or "state" field), lower-cased
+deployment_status_of() {
+    echo "$1" | grep -o '"\(status\|state\)"[[:space:]]*:[[:space:]]*"[^"]*"' | head -1 \
+        | sed 's/.*:[[:space:]]*"\([^"]*\)"/\1/' | tr '[:upper:]' '[:lower:]' || true
+}
+
+add_deployed_server() {
+    DEPLOYED_SERVERS="${DEPLOYED_SERVERS:+$DEPLOYED_SERVERS,}$1"
+}
+
+add_failed_server() {
+    FAILED_SERVERS="${FAILED_SERVERS:+$FAILED_SERVERS,}$1"
+}
+
+# Submit a deployment of the zone to one server without waiting for it to finish.
+# Synchronous appliances (200/201/204 with a finished or missing status) count as
+# deployed immediately; queued jobs are added to PENDING_DEPLOYMENTS.
+submit_deployment() {
+    local server_id="$1"
+    local job_id status
+    local submitted_ms
+
+    submitted_ms=$(now_ms)
+    deploy_zone_to_server "$server_id"
+    echo "Server $server_id - HTTP Code: $DEPLOY_HTTP_CODE" >&2
+    echo "Server $server_id - Response: $(echo "$DEPLOY_BODY" | head -c 300)" >&2
+
+    case "$DEPLOY_HTTP_CODE" in
+        200|201|202|204)
+            job_id=$(echo "$DEPLOY_BODY" | grep -o '"id"[[:space:]]*:[[:space:]]*"[^"]*"' | head -1 \
+                | sed 's/.*:[[:space:]]*"\([^"]*\)"/\1/' || true)
+            status=$(deployment_status_of "$DEPLOY_BODY")
+            case "$status" in
+                failed|error|cancelled|canceled)
+                    echo "✗ Deployment to server $server_id failed: $status" >&2
+                    add_failed_server "$server_id"
+                    server_deploy_done "$server_id" "$submitted_ms"
+                    ;;
+                queued|pending|running|in_progress|started)
+                    if [ -n "$job_id" ]; then
+                        echo "Deployment to server $server_id queued as job $job_id" >&2
+                        PENDING_DEPLOYMENTS="${PENDING_DEPLOYMENTS:+$PENDING_DEPLOYMENTS }$server_id:$job_id:$submitted_ms"
+                    else
+                        echo "✓ Deployment to server $server_id accepted" >&2
+                        add_deployed_server "$server_id"
+                        server_deploy_done "$server_id" "$submitted_ms"
+                    fi
+                    ;;
+                *)
+                    echo "✓ Successfully deployed to server $server_id" >&2
+                    add_deployed_server "$server_id"
+                    server_deploy_done "$server_id" "$submitted_ms"
+                    ;;
+            esac
+            ;;
+        *)
+            echo "✗ Deployment to server $server_id failed. HTTP Code: $DEPLOY_HTTP_CODE" >&2
+            add_failed_server "$server_id"
+            server_deploy_done "$server_id" "$submitted_ms"
+            ;;
+    esac
+}
+
+# Poll all queued deployment jobs together until each one finishes or DEPLOY_TIMEOUT
+# seconds pass. Finished jobs are moved to DEPLOYED_SERVERS or FAILED_SERVERS.
+# Entries are "server_id:job_id:submitted_ms".
+wait_for_deployments() {
+    local deadline=$(( $(date +%s) + ${DEPLOY_TIMEOUT:-600} ))
+    local delay_ms=200
+    local entry server_id job_id submitted_ms body status remaining
+
+    while [ -n "$PENDING_DEPLOYMENTS" ]; do
+        remaining=""
+        for entry in $PENDING_DEPLOYMENTS; do
+            server_id="${entry%%:*}"
+            job_id="${entry#*:}"
+            submitted_ms="${job_id##*:}"
+            job_id="${job_id%:*}"
+            body=$(gcurl -s -X GET "$BASE_API_URL/deployments/$job_id" -H "$auth_header")
+            status=$(deployment_status_of "$body")
+
+            case "$status" in
+                completed|complete|succeeded|success|successful|done)
+                    echo "✓ Deployment job $job_id on server $server_id completed" >&2
+                    add_deployed_server "$server_id"
+                    server_deploy_done "$server_id" "$submitted_ms"
+                    ;;
+                failed|error|cancelled|canceled)
+                    echo "✗ Deployment job $job_id on server $server_id $status: $body" >&2
+                    add_failed_server "$server_id"
+                    server_deploy_done "$server_id" "$submitted_ms"
+                    ;;
+                *)
+                    remaining="${remaining:+$remaining }$entry"
+                    ;;
+            esac
+        done
+        PENDING_DEPLOYMENTS="$remaining"
+
+        if [ -n "$PENDING_DEPLOYMENTS" ]; then
+            if [ "$(date +%s)" -ge "$deadline" ]; then
+                for entry in $PENDING_DEPLOYMENTS; do
+                    job_id="${entry#*:}"
+                    echo "✗ Deployment job ${job_id%:*} on server ${entry%%:*} timed out" >&2
+                    add_failed_server "${entry%%:*}"
+                    server_deploy_done "${entry%%:*}" "${entry##*:}"
+                done
+                PENDING_DEPLOYMENTS=""
+                break
+            fi
+            # Small jobs finish in well under a second; back off from 0.2s up to 5s
+            sleep "$(awk "BEGIN { printf \"%.3f\", $delay_ms / 1000 }")"
+            delay_ms=$(( delay_ms * 2 ))
+            if [ "$delay_ms" -gt 5000 ]; then
+                delay_ms=5000
+            fi
+        fi
+    done
+}
+
+# --- Zone resolution ---
+
+# Full name of a record: the zone itself for the apex (record name "@" or empty)
+record_fqdn() {
+    if [ -z "$1" ] || [ "$1" = "@" ]; then
+        echo "$2"
+    else
+        echo "$1.$2"
+    fi
+}
+
+# Resolve an FQDN to its most specific enclosing zone (optionally within a view).
+# Uses the zones/resolve endpoint when the server provides it, otherwise tries the
+# FQDN itself and then each parent suffix, longest first, with zones?name=. Sets
+# RESOLVED_ZONE, RESOLVED_ZONE_ID and RESOLVED_RECORD_NAME ("@" for the zone apex);
+# returns 1 if no zone matches.
+resolve_fqdn() {
+    local fqdn view_param="" result http_code body candidate id
+
+    fqdn=$(echo "${1%.}" | tr '[:upper:]' '[:lower:]')
+    if [ -n "$2" ]; then
+        view_param="&view=$2"
+    fi
+    RESOLVED_ZONE=""
+    RESOLVED_ZONE_ID=""
+    RESOLVED_RECORD_NAME=""
+
+    result=$(gcurl -s -w "\nHTTP_CODE:%{http_code}" -X GET "$BASE_API_URL/zones/resolve?fqdn=$fqdn$view_param" -H "$auth_header")
+    http_code=$(echo "$result" | grep "HTTP_CODE:" | sed 's/HTTP_CODE://')
+    body=$(echo "$result" | sed '/HTTP_CODE:/d')
+
+    if [ "$http_code" = "200" ]; then
+        RESOLVED_ZONE=$(echo "$body" | grep -o '"name"[[:space:]]*:[[:space:]]*"[^"]*"' | head -1 \
+            | sed 's/.*:[[:space:]]*"\([^"]*\)"/\1/' | tr '[:upper:]' '[:lower:]' || true)
+        RESOLVED_ZONE_ID=$(echo "$body" | grep -o '"id"[[:space:]]*:[[:space:]]*[0-9]*' | head -1 | grep -o '[0-9]*$' || true)
+    fi
+
+    if [ -z "$RESOLVED_ZONE_ID" ] || [ -z "$RESOLVED_ZONE" ]; then
+        echo "Zone resolve endpoint unavailable (HTTP $http_code), trying parent suffixes..." >&2
+        RESOLVED_ZONE_ID=""
+        candidate="$fqdn"
+        while [ -n "$candidate" ]; do
+            body=$(gcurl -s -X GET "$BASE_API_URL/zones?name=$candidate$view_param" -H "$auth_header")
+            id=$(echo "$body" | grep -o '"id"[[:space:]]*:[[:space:]]*[0-9]*' | head -1 | grep -o '[0-9]*$' || true)
+            if [ -n "$id" ]; then
+                RESOLVED_ZONE="$candidate"
+                RESOLVED_ZONE_ID="$id"
+                break
+            fi
+            if [ "$candidate" = "${candidate#*.}" ]; then
+                break
+            fi
+            candidate="${candidate#*.}"
+        done
+    fi
+
+    if [ -z "$RESOLVED_ZONE_ID" ]; then
+        return 1
+    fi
+    if [ "$fqdn" = "$RESOLVED_ZONE" ]; then
+        RESOLVED_RECORD_NAME="@"
+    else
+        RESOLVED_RECORD_NAME="${fqdn%.$RESOLVED_ZONE}"
+    fi
+}
@@ -4,6 +4,9 @@
 
 set -e
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/common.sh"
+
 # Read JSON input from stdin (same pattern as manage_record.sh)
 input=$(cat)
 
@@ -24,7 +27,20 @@ RECORD_TYPE=$(extract_json "$input" "record_type")
 RECORD_NAME=$(extract_json "$input" "record_name")
 RECORD_ID=$(extract_json "$input" "record_id")
 API_PATH=$(extract_json "$input" "api_path")
+FQDN_INPUT=$(extract_json "$input" "fqdn")
 AUTO_DEPLOY=$(extract_json "$input" "auto_deploy")
+# Tuning options are not destroy triggers (changing one would replace the record), so
+# destroy takes them from the environment
+DIFFERENTIAL_THRESHOLD=$(extract_json "$input" "differential_threshold")
+DIFFERENTIAL_THRESHOLD="${DIFFERENTIAL_THRESHOLD:-${BLUECAT_DIFFERENTIAL_THRESHOLD:-50}}"
+DEPLOY_TIMEOUT=$(extract_json "$input" "deploy_timeout")
+DEPLOY_TIMEOUT="${DEPLOY_TIMEOUT:-${BLUECAT_DEPLOY_TIMEOUT:-600}}"
+TRACE_FILE=$(extract_json "$input" "trace_file")
+TRACE_FILE="${TRACE_FILE:-$BLUECAT_TRACE_FILE}"
+GOVERNOR_MAX_INFLIGHT=$(extract_json "$input" "max_in_flight")
+GOVERNOR_MAX_INFLIGHT="${GOVERNOR_MAX_INFLIGHT:-${BLUECAT_MAX_IN_FLIGHT:-10}}"
+GOVERNOR_RPS=$(extract_json "$input" "requests_per_second")
+GOVERNOR_RPS="${GOVERNOR_RPS:-${BLUECAT_REQUESTS_PER_SECOND:-0}}"
 
 # Debug: Show what we extracted
 echo "DEBUG: Delete operation - Extracted values:" >&2
@@ -36,10 +52,11 @@ echo "  RECORD_NAME: $RECORD_NAME" >&2
 echo "  RECORD_TYPE: $RECORD_TYPE" >&2
 echo "  RECORD_ID: $RECORD_ID" >&2
 echo "  AUTO_DEPLOY: $AUTO_DEPLOY" >&2
+echo "  DIFFERENTIAL_THRESHOLD: $DIFFERENTIAL_THRESHOLD" >&2
 echo "" >&2
 
 # Validate required fields
-if [ -z "$API_URL" ] || [ -z "$USERNAME" ] || [ -z "$PASSWORD" ] || [ -z "$ZONE" ]; then
+if [ -z "$API_URL" ] || [ -z "$USERNAME" ] || [ -z "$PASSWORD" ] || { [ -z "$ZONE" ] && [ -z "$FQDN_INPUT" ]; }; then
     echo "ERROR: Missing required fields for deletion" >&2
     echo "Input received: $input" >&2
     exit 1
@@ -51,15 +68,21 @@ if [ -n "$API_PATH" ]; then
 else
     BASE_API_URL="$API_URL/api/v2"
 fi
+governor_init
 
-FQDN="$RECORD_NAME.$ZONE"
+if [ -n "$ZONE" ]; then
+    FQDN=$(record_fqdn "$RECORD_NAME" "$ZONE")
+else
+    FQDN="${FQDN_INPUT%.}"
+fi
 
 echo "Deleting DNS record: $FQDN ($RECORD_TYPE) using API v2"
 echo "Base API URL: $BASE_API_URL"
 
 # --- Authentication ---
 echo "Authenticating..."
-auth_response=$(curl -s -X POST "$BASE_API_URL/sessions" \
+phase_start
+auth_response=$(gcurl -s -X POST "$BASE_API_URL/sessions" \
     -H "Content-Type: application/json" \
     -d "{\"username\":\"$USERNAME\",\"password\":\"$PASSWORD\"}")
 
@@ -76,16 +99,28 @@ if [ -z "$token" ] || [ "$token" = "null" ]; then
 fi
 
 echo "Token extracted successfully: ${token:0:8}..."
+phase_end auth
 auth_header="Authorization: Bearer $token"
 
 # --- Get Zone ---
-echo "Getting zone ID for: $ZONE"
-if [ -n "$VIEW" ]; then
+phase_start
+if [ -z "$ZONE" ]; then
+    echo "Resolving zone for FQDN: $FQDN"
+    if resolve_fqdn "$FQDN" "$VIEW"; then
+        ZONE="$RESOLVED_ZONE"
+        RECORD_NAME="$RESOLVED_RECORD_NAME"
+        FQDN=$(record_fqdn "$RECORD_NAME" "$ZONE")
+        zone_response="{\"id\":$RESOLVED_ZONE_ID}"
+    else
+        zone_response="No enclosing zone found"
+    fi
+elif [ -n "$VIEW" ]; then
+    echo "Getting zone ID for: $ZONE"
     echo "Using view filter: $VIEW"
-    zone_response=$(curl -s -X GET "$BASE_API_URL/zones?name=$ZONE&view=$VIEW" -H "$auth_header")
+    zone_response=$(gcurl -s -X GET "$BASE_API_URL/zones?name=$ZONE&view=$VIEW" -H "$auth_header")
 else
     echo "No view filter specified"
-    zone_response=$(curl -s -X GET "$BASE_API_URL/zones?name=$ZONE" -H "$auth_header")
+    zone_response=$(gcurl -s -X GET "$BASE_API_URL/zones?name=$ZONE" -H "$auth_header")
 fi
 
 zone_id=$(echo "$zone_response" | grep -o '"id"[[:space:]]*:[[:space:]]*[0-9]*' | sed 's/.*"id"[[:space:]]*:[[:space:]]*\([0-9]*\).*/\1/' | head -1)
@@ -101,19 +136,22 @@ if [ -z "$zone_id" ] || [ "$zone_id" = "null" ]; then
 fi
 
 echo "Zone ID: $zone_id"
+phase_end zone_lookup
 
 # --- Find record to delete ---
 echo "Finding record to delete..."
-record_response=$(curl -s -X GET "$BASE_API_URL/records?zone=$zone_id&name=$FQDN&type=$RECORD_TYPE" -H "$auth_header")
+phase_start
+record_response=$(gcurl -s -X GET "$BASE_API_URL/records?zone=$zone_id&name=$FQDN&type=$RECORD_TYPE" -H "$auth_header")
 echo "DEBUG DELETE: Record search response: $record_response" >&2
 
 record_id=$(echo "$record_response" | grep -o '"id"[[:space:]]*:[[:space:]]*[0-9]*' | head -1 | sed 's/.*:[[:space:]]*\([0-9]*\).*/\1/')
 echo "DEBUG DELETE: Extracted record ID: $record_id" >&2
+phase_end record_lookup
 
 if [ -z "$record_id" ]; then
     echo "Record not found: $FQDN ($RECORD_TYPE)"
     echo "This may be expected if the record was already deleted."
-    curl -s -X DELETE "$BASE_API_URL/sessions/$token" -H "$auth_header" > /dev/null 2>&1
+    gcurl -s -X DELETE "$BASE_API_URL/sessions/$token" -H "$auth_header" > /dev/null 2>&1
     exit 0
 fi
 
@@ -121,16 +159,18 @@ echo "Found record ID: $record_id"
 
 # --- Delete record ---
 echo "Deleting record..." >&2
-delete_code=$(curl -s -o /dev/null -w "%{http_code}" \
+phase_start
+delete_code=$(gcurl -s -o /dev/null -w "%{http_code}" \
     -X DELETE "$BASE_API_URL/records/$record_id" \
     -H "$auth_header")
 
 if [ "$delete_code" = "204" ] || [ "$delete_code" = "200" ]; then
     echo "Record deleted successfully" >&2
     operation_status="deleted"
+    phase_end write
 else
     echo "Delete failed with code: $delete_code" >&2
-    curl -s -X DELETE "$BASE_API_URL/sessions/$token" -H "$auth_header" > /dev/null 2>&1 >&2
+    gcurl -s -X DELETE "$BASE_API_URL/sessions/$token" -H "$auth_header" > /dev/null 2>&1 >&2
     exit 1
 fi
 
@@ -145,10 +185,11 @@ if [ "$AUTO_DEPLOY" = "true" ] || [ "$AUTO_DEPLOY" = "1" ]; then
     
     # Get deployment roles for the zone
     echo "Auto-discovering DNS servers for zone..." >&2
+    phase_start
     roles_url="$BASE_API_URL/zones/$zone_id/deploymentRoles"
     echo "DEBUG DELETE: Getting deployment roles from URL: $roles_url" >&2
     
-    roles_response=$(curl -s -X GET "$roles_url" -H "$auth_header")
+    roles_response=$(gcurl -s -X GET "$roles_url" -H "$auth_header")
     
     echo "DeploymentRoles response: $roles_response" >&2
     
@@ -161,49 +202,28 @@ if [ "$AUTO_DEPLOY" = "true" ] || [ "$AUTO_DEPLOY" = "1" ]; then
         servers_url="$BASE_API_URL/servers?type=DNS"
         echo "DEBUG DELETE: Getting DNS servers from URL: $servers_url" >&2
         
-        servers_response=$(curl -s -X GET "$servers_url" -H "$auth_header")
+        servers_response=$(gcurl -s -X GET "$servers_url" -H "$auth_header")
         echo "Servers response (first 500 chars): $(echo "$servers_response" | head -c 500)" >&2
         
         server_ids=$(echo "$servers_response" | grep -o '"id"[[:space:]]*:[[:space:]]*[0-9]*' | grep -o '[0-9]*' | head -10)
     fi
+    phase_end deploy_discovery
     
     if [ -n "$server_ids" ]; then
         echo "Found servers to deploy to: $server_ids" >&2
         
-        deployed_list=""
+        # Submit to every server first, then wait for all jobs together
+        phase_start
         for server_id in $server_ids; do
             echo "Attempting deployment to server ID: $server_id" >&2
-            
-            deploy_url="$BASE_API_URL/deployments"
-            echo "DEBUG DELETE: Deploying to URL: $deploy_url using v2 API" >&2
-            
-            deploy_response=$(curl -s -w "HTTPSTATUS:%{http_code}" \
-                -X POST "$deploy_url" \
-                -H "$auth_header" \
-                -H "Content-Type: application/json" \
-                -d "{\"type\":\"FullDeployment\",\"service\":\"DNS\",\"serverId\":$server_id,\"entityId\":$zone_id}")
-            
-            http_code=$(echo "$deploy_response" | grep -o "HTTPSTATUS:[0-9]*" | grep -o "[0-9]*")
-            response_body=$(echo "$deploy_response" | sed 's/HTTPSTATUS:[0-9]*$//')
-            
-            echo "  HTTP Code: $http_code" >&2
-            echo "  Response: $(echo "$response_body" | head -c 200)" >&2
-            
-            if [ "$http_code" = "200" ] || [ "$http_code" = "201" ]; then
-                echo "  ✓ Successfully deployed to server $server_id" >&2
-                if [ -z "$deployed_list" ]; then
-                    deployed_list="$server_id"
-                else
-                    deployed_list="$deployed_list,$server_id"
-                fi
-            else
-                echo "  ✗ Deployment failed to server $server_id" >&2
-            fi
+            submit_deployment "$server_id"
         done
+        wait_for_deployments
+        phase_end deploy
         
-        if [ -n "$deployed_list" ]; then
+        if [ -n "$DEPLOYED_SERVERS" ]; then
             deployment_status="deployed"
-            deployed_servers="$deployed_list"
+            deployed_servers="$DEPLOYED_SERVERS"
             echo "============================================" >&2
             echo "Deployment completed: $deployment_status" >&2
             echo "Deployed to servers: $deployed_servers" >&2
@@ -221,8 +241,8 @@ if [ "$AUTO_DEPLOY" = "true" ] || [ "$AUTO_DEPLOY" = "1" ]; then
 fi
 
 # --- Logout ---
-curl -s -X DELETE "$BASE_API_URL/sessions/$token" -H "$auth_header" > /dev/null 2>&1
+gcurl -s -X DELETE "$BASE_API_URL/sessions/$token" -H "$auth_header" > /dev/null 2>&1
 echo "Session closed" >&2
 
 # Output JSON result for Terraform (to stdout)
-echo "{\"record_id\":\"$record_id\",\"operation_status\":\"$operation_status\",\"fqdn\":\"$FQDN\",\"zone_id\":\"$zone_id\",\"deployment_status\":\"$deployment_status\",\"deployed_servers\":\"$deployed_servers\"}"
\ No newline at end of file
+echo "{\"record_id\":\"$record_id\",\"operation_status\":\"$operation_status\",\"fqdn\":\"$FQDN\",\"zone_id\":\"$zone_id\",\"deployment_status\":\"$deployment_status\",\"deployed_servers\":\"$deployed_servers\"$(timing_json)}"
\ No newline at end of file
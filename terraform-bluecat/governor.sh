@@ -0,0 +1,288 @@
+#!/bin/bash
+# Cross-process request governor for manage_record.sh and delete_record.sh
+#
+# Every API call goes through gcurl, a drop-in wrapper around curl. All script
+# processes of a run (Terraform starts one per resource) share a state directory,
+# keyed by API URL, and through it:
+#   - an in-flight cap: at most GOVERNOR_LIMIT requests run at once, enforced
+#     with one lock file per slot (flock, or mkdir locks where flock is missing)
+#   - a requests-per-second budget: a token bucket kept in the state file
+#   - adaptation: the cap is halved when the appliance answers 429/503 (at most
+#     once a second) and grows by one after each window of successful requests,
+#     up to GOVERNOR_MAX_INFLIGHT. Throttled requests are retried after
+#     Retry-After.
+#
+# Callers set GOVERNOR_MAX_INFLIGHT (0 disables the governor), GOVERNOR_RPS
+# (0 = no budget) and API_URL, then call governor_init. Requires now_ms.
+
+GOVERNOR_RETRIES=${GOVERNOR_RETRIES:-4}
+# Longest Retry-After (seconds) honoured; larger values are capped to this
+GOVERNOR_RETRY_AFTER_MAX=${GOVERNOR_RETRY_AFTER_MAX:-60}
+GOVERNOR_DIR=""
+GOVERNOR_SLOT=""
+GOVERNOR_HAS_FLOCK=""
+
+# Pick the shared state directory for this API and create the state file
+governor_init() {
+    local key
+
+    if [ -z "$GOVERNOR_MAX_INFLIGHT" ] || [ "$GOVERNOR_MAX_INFLIGHT" -le 0 ] 2>/dev/null; then
+        GOVERNOR_MAX_INFLIGHT=0
+        return 0
+    fi
+    GOVERNOR_RPS=${GOVERNOR_RPS:-0}
+
+    if [ -z "$GOVERNOR_DIR" ]; then
+        key=$(printf '%s' "$API_URL" | cksum | cut -d' ' -f1)
+        GOVERNOR_DIR="${TMPDIR:-/tmp}/bluecat-governor-$key"
+    fi
+    mkdir -p "$GOVERNOR_DIR"
+    if command -v flock > /dev/null 2>&1; then
+        GOVERNOR_HAS_FLOCK=1
+    fi
+
+    governor_lock
+    if [ ! -s "$GOVERNOR_DIR/state" ]; then
+        governor_write_state "$GOVERNOR_MAX_INFLIGHT" 0 0 "$(governor_burst_milli)" "$(now_ms)"
+    fi
+    governor_unlock
+}
+
+# Token bucket capacity in milli-tokens: one second's worth of requests
+governor_burst_milli() {
+    if [ "$GOVERNOR_RPS" -gt 0 ] 2>/dev/null; then
+        echo $(( GOVERNOR_RPS * 1000 ))
+    else
+        echo 1000
+    fi
+}
+
+# --- State file: "limit successes last_cut_ms tokens_milli last_refill_ms" ---
+
+governor_write_state() {
+    printf '%s %s %s %s %s\n' "$@" > "$GOVERNOR_DIR/state.$$"
+    mv -f "$GOVERNOR_DIR/state.$$" "$GOVERNOR_DIR/state"
+}
+
+# Read the state into G_LIMIT, G_SUCCESSES, G_LAST_CUT, G_TOKENS and G_REFILLED
+governor_read_state() {
+    read -r G_LIMIT G_SUCCESSES G_LAST_CUT G_TOKENS G_REFILLED < "$GOVERNOR_DIR/state" || true
+    G_LIMIT=${G_LIMIT:-$GOVERNOR_MAX_INFLIGHT}
+    if [ "$G_LIMIT" -gt "$GOVERNOR_MAX_INFLIGHT" ] || [ "$G_LIMIT" -lt 1 ]; then
+        G_LIMIT=$GOVERNOR_MAX_INFLIGHT
+    fi
+    G_SUCCESSES=${G_SUCCESSES:-0}
+    G_LAST_CUT=${G_LAST_CUT:-0}
+    G_TOKENS=${G_TOKENS:-0}
+    G_REFILLED=${G_REFILLED:-0}
+}
+
+# Short critical section around state file updates
+governor_lock() {
+    local waited=0 holder
+
+    if [ -n "$GOVERNOR_HAS_FLOCK" ]; then
+        exec 8>"$GOVERNOR_DIR/state.lock"
+        flock 8
+        return 0
+    fi
+    until mkdir "$GOVERNOR_DIR/state.lock.d" 2>/dev/null; do
+        waited=$(( waited + 1 ))
+        # Break the lock only when its holder died without releasing it. A
+        # live holder may just be slow (e.g. stopped or on a loaded machine)
+        if [ "$waited" -ge 200 ]; then
+            holder=$(cat "$GOVERNOR_DIR/state.lock.d/pid" 2>/dev/null || true)
+            if [ -n "$holder" ] && ! kill -0 "$holder" 2>/dev/null; then
+                rm -rf "$GOVERNOR_DIR/state.lock.d"
+            fi
+            waited=0
+        fi
+        sleep 0.01
+    done
+    echo $$ > "$GOVERNOR_DIR/state.lock.d/pid"
+}
+
+governor_unlock() {
+    if [ -n "$GOVERNOR_HAS_FLOCK" ]; then
+        exec 8>&-
+    else
+        rm -rf "$GOVERNOR_DIR/state.lock.d"
+    fi
+}
+
+# --- Slots ---
+
+# Try to take one of the first $1 slots; sets GOVERNOR_SLOT on success
+governor_try_slot() {
+    local limit="$1" i=0 holder
+
+    while [ "$i" -lt "$limit" ]; do
+        if [ -n "$GOVERNOR_HAS_FLOCK" ]; then
+            exec 9>"$GOVERNOR_DIR/slot.$i"
+            if flock -n 9; then
+                GOVERNOR_SLOT=$i
+                return 0
+            fi
+            exec 9>&-
+        else
+            if mkdir "$GOVERNOR_DIR/slot.$i.d" 2>/dev/null; then
+                echo $$ > "$GOVERNOR_DIR/slot.$i.d/pid"
+                GOVERNOR_SLOT=$i
+                return 0
+            fi
+            # Free slots whose holder died without releasing them
+            holder=$(cat "$GOVERNOR_DIR/slot.$i.d/pid" 2>/dev/null || true)
+            if [ -n "$holder" ] && ! kill -0 "$holder" 2>/dev/null; then
+                rm -rf "$GOVERNOR_DIR/slot.$i.d"
+                continue
+            fi
+        fi
+        i=$(( i + 1 ))
+    done
+    return 1
+}
+
+governor_release_slot() {
+    if [ -z "$GOVERNOR_SLOT" ]; then
+        return 0
+    fi
+    if [ -n "$GOVERNOR_HAS_FLOCK" ]; then
+        exec 9>&-
+    else
+        rm -rf "$GOVERNOR_DIR/slot.$GOVERNOR_SLOT.d"
+    fi
+    GOVERNOR_SLOT=""
+}
+
+# --- Admission ---
+
+# Take one token from the shared bucket; prints 0, or the milliseconds to wait
+governor_take_token() {
+    local now elapsed wait_ms=0
+
+    governor_lock
+    governor_read_state
+    now=$(now_ms)
+    elapsed=$(( now - G_REFILLED ))
+    if [ "$elapsed" -gt 0 ]; then
+        G_TOKENS=$(( G_TOKENS + elapsed * GOVERNOR_RPS ))
+        if [ "$G_TOKENS" -gt "$(governor_burst_milli)" ]; then
+            G_TOKENS=$(governor_burst_milli)
+        fi
+        G_REFILLED=$now
+    fi
+    if [ "$G_TOKENS" -ge 1000 ]; then
+        G_TOKENS=$(( G_TOKENS - 1000 ))
+    else
+        wait_ms=$(( (1000 - G_TOKENS + GOVERNOR_RPS - 1) / GOVERNOR_RPS ))
+    fi
+    governor_write_state "$G_LIMIT" "$G_SUCCESSES" "$G_LAST_CUT" "$G_TOKENS" "$G_REFILLED"
+    governor_unlock
+    echo "$wait_ms"
+}
+
+# Block until a slot under the current cap is free and the rate budget allows a request
+governor_acquire() {
+    local delay_ms=20 wait_ms limit
+
+    if [ "$GOVERNOR_MAX_INFLIGHT" -le 0 ]; then
+        return 0
+    fi
+
+    while :; do
+        read -r limit _ < "$GOVERNOR_DIR/state" 2>/dev/null || limit=""
+        if [ -z "$limit" ] || [ "$limit" -lt 1 ] || [ "$limit" -gt "$GOVERNOR_MAX_INFLIGHT" ]; then
+            limit=$GOVERNOR_MAX_INFLIGHT
+        fi
+        if governor_try_slot "$limit"; then
+            break
+        fi
+        sleep "$(awk "BEGIN { printf \"%.3f\", $delay_ms / 1000 }")"
+        if [ "$delay_ms" -lt 200 ]; then
+            delay_ms=$(( delay_ms * 2 ))
+        fi
+    done
+
+    if [ "$GOVERNOR_RPS" -gt 0 ]; then
+        while wait_ms=$(governor_take_token) && [ "$wait_ms" -gt 0 ]; do
+            sleep "$(awk "BEGIN { printf \"%.3f\", $wait_ms / 1000 }")"
+        done
+    fi
+}
+
+# Release the slot and adapt the cap to the response status
+governor_release() {
+    local status="$1" now
+
+    if [ "$GOVERNOR_MAX_INFLIGHT" -le 0 ]; then
+        return 0
+    fi
+    governor_release_slot
+
+    governor_lock
+    governor_read_state
+    case "$status" in
+        429|503)
+            now=$(now_ms)
+            # Many requests fail at once when overloaded; count that as one signal
+            if [ $(( now - G_LAST_CUT )) -ge 1000 ]; then
+                G_LIMIT=$(( G_LIMIT / 2 ))
+                if [ "$G_LIMIT" -lt 1 ]; then
+                    G_LIMIT=1
+                fi
+                G_LAST_CUT=$now
+                echo "Governor: HTTP $status, in-flight cap lowered to $G_LIMIT" >&2
+            fi
+            G_SUCCESSES=0
+            ;;
+        2*|3*|4*)
+            G_SUCCESSES=$(( G_SUCCESSES + 1 ))
+            if [ "$G_SUCCESSES" -ge "$G_LIMIT" ] && [ "$G_LIMIT" -lt "$GOVERNOR_MAX_INFLIGHT" ]; then
+                G_LIMIT=$(( G_LIMIT + 1 ))
+                G_SUCCESSES=0
+            fi
+            ;;
+    esac
+    governor_write_state "$G_LIMIT" "$G_SUCCESSES" "$G_LAST_CUT" "$G_TOKENS" "$G_REFILLED"
+    governor_unlock
+}
+
+# curl through the governor. Takes curl's arguments and prints what curl printed
+# (for the final attempt); 429/503 answers are retried after Retry-After.
+gcurl() {
+    local headers output rc status retry_after attempt=1
+
+    if [ "$GOVERNOR_MAX_INFLIGHT" -le 0 ]; then
+        curl "$@"
+        return
+    fi
+
+    headers=$(mktemp)
+    while :; do
+        governor_acquire
+        rc=0
+        output=$(curl -D "$headers" "$@") || rc=$?
+        status=$(sed -n 's/^HTTP\/[0-9.]* \([0-9][0-9]*\).*/\1/p' "$headers" | tail -1)
+        governor_release "$status"
+
+        if { [ "$status" = "429" ] || [ "$status" = "503" ]; } && [ "$attempt" -le "$GOVERNOR_RETRIES" ]; then
+            retry_after=$(sed -n 's/^[Rr][Ee][Tt][Rr][Yy]-[Aa][Ff][Tt][Ee][Rr]:[[:space:]]*\([^[:space:]]*\).*/\1/p' "$headers" | tail -1)
+            # Only delay-seconds is honoured; an HTTP-date (or garbage) backs off by attempt
+            case "$retry_after" in
+                ''|*[!0-9]*) retry_after=$attempt ;;
+            esac
+            if [ "$retry_after" -gt "$GOVERNOR_RETRY_AFTER_MAX" ] 2>/dev/null || [ "${#retry_after}" -gt 9 ]; then
+                retry_after=$GOVERNOR_RETRY_AFTER_MAX
+            fi
+            echo "HTTP $status from the API, retrying in ${retry_after}s ($attempt/$GOVERNOR_RETRIES)" >&2
+            sleep "$retry_after"
+            attempt=$(( attempt + 1 ))
+            continue
+        fi
+        break
+    done
+    rm -f "$headers"
+
+    printf '%s\n' "$output"
+    return $rc
+}
@@ -12,24 +12,70 @@ terraform {
   }
 }
 
-# Use external data source to execute script and capture output
-# This replaces the local file approach which fails in Azure DevOps ephemeral agents
-data "external" "dns_record" {
-  program = ["bash", "${path.module}/manage_record.sh"]
-
-  query = {
+locals {
+  record_query = {
     api_url       = var.api_url
     username      = var.username
     password      = var.password
     zone          = var.zone
     record_type   = var.record_type
     record_name   = var.record_name
+    fqdn          = var.fqdn
+    view          = var.view
     record_value  = var.record_value
     ttl           = tostring(var.ttl)
     api_version   = var.api_version
     api_path      = var.api_path
     dns_server_id = var.dns_server_id
     auto_deploy   = tostring(var.auto_deploy)
+
+    differential_threshold = tostring(var.differential_threshold)
+    deploy_timeout         = tostring(var.deploy_timeout)
+    trace_file             = var.trace_file
+    max_in_flight          = tostring(var.max_in_flight)
+    requests_per_second    = tostring(var.requests_per_second)
+  }
+}
+
+# Use external data source to execute script and capture output
+# This replaces the local file approach which fails in Azure DevOps ephemeral agents
+# In read-only mode it only looks the record up and predicts the operation
+data "external" "dns_record" {
+  program = ["bash", "${path.module}/manage_record.sh"]
+
+  query = merge(local.record_query, { read_only = tostring(var.read_only) })
+}
+
+# Read-only mode: the write and deployment happen here, at apply time
+# Re-run when the desired record changes or the lookup finds the record missing or drifted
+resource "null_resource" "dns_record_apply" {
+  count = var.read_only ? 1 : 0
+
+  triggers = {
+    api_url       = var.api_url
+    zone          = data.external.dns_record.result.zone
+    record_name   = data.external.dns_record.result.record_name
+    record_type   = var.record_type
+    record_value  = var.record_value
+    ttl           = tostring(var.ttl)
+    view          = var.view
+    api_path      = var.api_path
+    dns_server_id = var.dns_server_id
+    auto_deploy   = tostring(var.auto_deploy)
+    # Unknown at plan time when the lookup finds drift, which forces the repair
+    sync          = local.sync_state
+  }
+
+  provisioner "local-exec" {
+    # Passed through the environment so the credentials are not echoed with the command.
+    # A replacement planned while the record already matches (e.g. after a trigger was added)
+    # writes nothing
+    command     = "if [ \"$BLUECAT_PREDICTED\" = unchanged ]; then echo 'Record already matches, nothing to write'; else printf '%s' \"$BLUECAT_QUERY\" | bash ${path.module}/manage_record.sh; fi"
+    interpreter = ["bash", "-c"]
+    environment = {
+      BLUECAT_QUERY     = jsonencode(merge(local.record_query, { read_only = "false" }))
+      BLUECAT_PREDICTED = local.operation_status
+    }
   }
 }
 
@@ -41,9 +87,11 @@ resource "null_resource" "dns_record_destroy" {
     api_url      = var.api_url
     username     = var.username
     password     = var.password
-    zone         = var.zone
+    # Resolved by the script, so FQDN-only records are destroyed in the right zone
+    zone         = data.external.dns_record.result.zone
     record_type  = var.record_type
-    record_name  = var.record_name
+    record_name  = data.external.dns_record.result.record_name
+    view         = var.view
     api_version  = var.api_version
     api_path     = var.api_path
     auto_deploy  = tostring(var.auto_deploy)
@@ -51,9 +99,16 @@ resource "null_resource" "dns_record_destroy" {
     record_id    = data.external.dns_record.result.record_id
   }
 
+  lifecycle {
+    # delete_record.sh finds the record by name; a new id (read-only mode learns it on the
+    # plan after the create, or the record was re-created) must not replace this resource,
+    # because replacing it deletes the record
+    ignore_changes = [triggers["record_id"]]
+  }
+
   provisioner "local-exec" {
     when        = destroy
-    command     = "echo '{\"api_url\":\"${self.triggers.api_url}\",\"username\":\"${self.triggers.username}\",\"password\":\"${self.triggers.password}\",\"zone\":\"${self.triggers.zone}\",\"record_type\":\"${self.triggers.record_type}\",\"record_name\":\"${self.triggers.record_name}\",\"record_id\":\"${self.triggers.record_id}\",\"api_path\":\"${self.triggers.api_path}\",\"auto_deploy\":\"${try(self.triggers.auto_deploy, "true")}\"}' | ${path.module}/delete_record.sh"
+    command     = "echo '{\"api_url\":\"${self.triggers.api_url}\",\"username\":\"${self.triggers.username}\",\"password\":\"${self.triggers.password}\",\"zone\":\"${self.triggers.zone}\",\"record_type\":\"${self.triggers.record_type}\",\"record_name\":\"${self.triggers.record_name}\",\"record_id\":\"${self.triggers.record_id}\",\"view\":\"${try(self.triggers.view, "")}\",\"api_path\":\"${self.triggers.api_path}\",\"auto_deploy\":\"${try(self.triggers.auto_deploy, "true")}\"}' | ${path.module}/delete_record.sh"
     interpreter = ["bash", "-c"]
   }
 }
@@ -67,4 +122,19 @@ locals {
   zone_id           = data.external.dns_record.result.zone_id
   deployment_status = data.external.dns_record.result.deployment_status
   deployed_servers  = data.external.dns_record.result.deployed_servers
+
+  # Read-only mode: always "in-sync" once applied. When the lookup finds drift it goes
+  # through timestamp(), which is unknown until apply, so the plan replaces the apply
+  # resource; the stored value stays "in-sync" and the plan after the repair is clean
+  sync_state = local.operation_status == "unchanged" ? "in-sync" : "${substr(timestamp(), 0, 0)}in-sync"
+
+  # Per-phase durations in milliseconds; older script versions don't report them
+  timings = {
+    for phase in ["auth", "zone_lookup", "record_lookup", "write", "deploy_discovery", "deploy", "total"] :
+    phase => tonumber(try(data.external.dns_record.result["timing_${phase}_ms"], "0"))
+  }
+  deploy_server_timings = {
+    for pair in compact(split(",", try(data.external.dns_record.result.timing_deploy_servers, ""))) :
+    split(":", pair)[0] => tonumber(split(":", pair)[1])
+  }
 }
\ No newline at end of file
@@ -4,6 +4,9 @@
 
 set -e
 
+SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
+source "$SCRIPT_DIR/common.sh"
+
 # Read JSON input from stdin (for external data source)
 input=$(cat)
 
@@ -19,12 +22,38 @@ TTL=$(echo "$input" | grep -o '"ttl":"[^"]*"' | sed 's/"ttl":"\(.*\)"/\1/')
 API_VERSION=$(echo "$input" | grep -o '"api_version":"[^"]*"' | sed 's/"api_version":"\(.*\)"/\1/')
 API_PATH=$(echo "$input" | grep -o '"api_path":"[^"]*"' | sed 's/"api_path":"\(.*\)"/\1/')
 
+# Optional: full record name, resolved to its zone when zone/record_name are not given
+FQDN_INPUT=$(echo "$input" | grep -o '"fqdn":"[^"]*"' | sed 's/"fqdn":"\(.*\)"/\1/' || echo "")
+
+# Optional: DNS view of the zone
+VIEW=$(echo "$input" | grep -o '"view":"[^"]*"' | sed 's/"view":"\(.*\)"/\1/' || echo "")
+
 # Optional: DNS Server ID for deployment (if empty, will auto-discover)
 DNS_SERVER_ID=$(echo "$input" | grep -o '"dns_server_id":"[^"]*"' | sed 's/"dns_server_id":"\(.*\)"/\1/' || echo "")
 
 # Auto-deploy flag
 AUTO_DEPLOY=$(echo "$input" | grep -o '"auto_deploy":"[^"]*"' | sed 's/"auto_deploy":"\(.*\)"/\1/' || echo "true")
 
+# Use a differential deployment when a zone has at most this many pending changes (0 = always full)
+DIFFERENTIAL_THRESHOLD=$(echo "$input" | grep -o '"differential_threshold":"[^"]*"' | sed 's/"differential_threshold":"\(.*\)"/\1/' || echo "")
+
+# Seconds to wait for queued deployment jobs to finish
+DEPLOY_TIMEOUT=$(echo "$input" | grep -o '"deploy_timeout":"[^"]*"' | sed 's/"deploy_timeout":"\(.*\)"/\1/' || echo "")
+
+# Read-only mode: look the record up and predict the operation, without writing or deploying
+READ_ONLY=$(echo "$input" | grep -o '"read_only":"[^"]*"' | sed 's/"read_only":"\(.*\)"/\1/' || echo "")
+
+# Optional: append per-phase timings as JSON lines to this file
+TRACE_FILE=$(echo "$input" | grep -o '"trace_file":"[^"]*"' | sed 's/"trace_file":"\(.*\)"/\1/' || echo "")
+TRACE_FILE="${TRACE_FILE:-$BLUECAT_TRACE_FILE}"
+
+# Shared limits for all script processes of a run (see governor.sh)
+GOVERNOR_MAX_INFLIGHT=$(echo "$input" | grep -o '"max_in_flight":"[^"]*"' | sed 's/"max_in_flight":"\(.*\)"/\1/' || echo "")
+GOVERNOR_MAX_INFLIGHT="${GOVERNOR_MAX_INFLIGHT:-${BLUECAT_MAX_IN_FLIGHT:-10}}"
+GOVERNOR_RPS=$(echo "$input" | grep -o '"requests_per_second":"[^"]*"' | sed 's/"requests_per_second":"\(.*\)"/\1/' || echo "")
+GOVERNOR_RPS="${GOVERNOR_RPS:-${BLUECAT_REQUESTS_PER_SECOND:-0}}"
+governor_init
+
 # Construct the full API base URL
 if [ -n "$API_PATH" ]; then
     BASE_API_URL="$API_URL$API_PATH"
@@ -32,7 +61,14 @@ else
     BASE_API_URL="$API_URL/api/v2"
 fi
 
-FQDN="$RECORD_NAME.$ZONE"
+if [ -n "$ZONE" ]; then
+    FQDN=$(record_fqdn "$RECORD_NAME" "$ZONE")
+elif [ -n "$FQDN_INPUT" ]; then
+    FQDN="${FQDN_INPUT%.}"
+else
+    echo "Either zone and record_name, or fqdn, must be provided" >&2
+    exit 1
+fi
 
 # Output debug info to stderr (won't interfere with JSON output)
 echo "Managing DNS record: $FQDN ($RECORD_TYPE) using API v2" >&2
@@ -40,7 +76,8 @@ echo "Base API URL: $BASE_API_URL" >&2
 
 # --- Authentication ---
 echo "Authenticating..." >&2
-auth_response=$(curl -s -X POST "$BASE_API_URL/sessions" \
+phase_start
+auth_response=$(gcurl -s -X POST "$BASE_API_URL/sessions" \
     -H "Content-Type: application/json" \
     -d "{\"username\":\"$USERNAME\",\"password\":\"$PASSWORD\"}")
 
@@ -57,32 +94,52 @@ if [ -z "$token" ] || [ "$token" = "null" ]; then
 fi
 
 echo "Token extracted successfully: ${token:0:8}..." >&2
+phase_end auth
 
 auth_header="Authorization: Bearer $token"
 
 # --- Get Zone ---
-echo "Getting zone ID for: $ZONE" >&2
-zone_response=$(curl -s -X GET "$BASE_API_URL/zones?name=$ZONE" -H "$auth_header")
+phase_start
+if [ -z "$ZONE" ]; then
+    # Only an FQDN was given: find the most specific zone that contains it
+    echo "Resolving zone for FQDN: $FQDN" >&2
+    if resolve_fqdn "$FQDN" "$VIEW"; then
+        ZONE="$RESOLVED_ZONE"
+        RECORD_NAME="$RESOLVED_RECORD_NAME"
+        FQDN=$(record_fqdn "$RECORD_NAME" "$ZONE")
+        zone_id="$RESOLVED_ZONE_ID"
+        echo "Resolved to zone $ZONE, record name $RECORD_NAME" >&2
+    else
+        zone_id=""
+        zone_response="No enclosing zone found"
+    fi
+else
+    echo "Getting zone ID for: $ZONE" >&2
+    zone_response=$(gcurl -s -X GET "$BASE_API_URL/zones?name=$ZONE${VIEW:+&view=$VIEW}" -H "$auth_header")
 
-zone_id=$(echo "$zone_response" | grep -o '"id"[[:space:]]*:[[:space:]]*[0-9]*' | sed 's/.*"id"[[:space:]]*:[[:space:]]*\([0-9]*\).*/\1/' | head -1)
+    zone_id=$(echo "$zone_response" | grep -o '"id"[[:space:]]*:[[:space:]]*[0-9]*' | sed 's/.*"id"[[:space:]]*:[[:space:]]*\([0-9]*\).*/\1/' | head -1)
 
-if [ -z "$zone_id" ]; then
-    zone_id=$(echo "$zone_response" | sed -n 's/.*"id"[[:space:]]*:[[:space:]]*\([0-9]*\).*/\1/p' | head -1)
+    if [ -z "$zone_id" ]; then
+        zone_id=$(echo "$zone_response" | sed -n 's/.*"id"[[:space:]]*:[[:space:]]*\([0-9]*\).*/\1/p' | head -1)
+    fi
 fi
 
 if [ -z "$zone_id" ] || [ "$zone_id" = "null" ]; then
-    echo "Zone not found: $ZONE" >&2
+    echo "Zone not found: ${ZONE:-$FQDN}" >&2
     echo "Response: $zone_response" >&2
     exit 1
 fi
 
 echo "Zone ID: $zone_id" >&2
+phase_end zone_lookup
 
 # --- Check existing record ---
 echo "Checking for existing record..." >&2
-record_response=$(curl -s -X GET "$BASE_API_URL/records?zone=$zone_id&name=$FQDN&type=$RECORD_TYPE" -H "$auth_header")
+phase_start
+record_response=$(gcurl -s -X GET "$BASE_API_URL/records?zone=$zone_id&name=$FQDN&type=$RECORD_TYPE" -H "$auth_header")
 
 record_id=$(echo "$record_response" | grep -o '"id":[0-9]*' | head -1 | sed 's/"id"://')
+phase_end record_lookup
 
 # --- Build JSON payload ---
 if [ "$RECORD_TYPE" = "A" ] || [ "$RECORD_TYPE" = "AAAA" ]; then
@@ -96,15 +153,37 @@ else
     exit 1
 fi
 
+# --- Read-only: predict the operation and stop ---
+if [ "$READ_ONLY" = "true" ] || [ "$READ_ONLY" = "1" ]; then
+    current_value=$(echo "$record_response" | grep -o '"rdata"[[:space:]]*:[[:space:]]*"[^"]*"' | head -1 | sed 's/^"rdata"[[:space:]]*:[[:space:]]*"\(.*\)"$/\1/')
+    current_ttl=$(echo "$record_response" | grep -o '"ttl"[[:space:]]*:[[:space:]]*"\{0,1\}[0-9]*' | head -1 | sed 's/.*[:"][[:space:]]*\([0-9]*\)$/\1/')
+
+    if [ -z "$record_id" ]; then
+        operation_status="would_create"
+    elif [ "$current_value" = "$RECORD_VALUE" ] && [ "$current_ttl" = "$TTL" ]; then
+        operation_status="unchanged"
+    else
+        operation_status="would_update"
+        echo "Current value: $current_value (TTL $current_ttl), wanted: $RECORD_VALUE (TTL $TTL)" >&2
+    fi
+    echo "Read-only mode: $operation_status, nothing written or deployed" >&2
+
+    gcurl -s -X DELETE "$BASE_API_URL/sessions/$token" -H "$auth_header" > /dev/null 2>&1
+    printf '{"record_id":"%s","operation_status":"%s","fqdn":"%s","zone":"%s","record_name":"%s","zone_id":"%s","deployment_status":"%s","deployed_servers":"%s"%s}\n' \
+        "$record_id" "$operation_status" "$FQDN" "$ZONE" "$RECORD_NAME" "$zone_id" "not_deployed" "" "$(timing_json)"
+    exit 0
+fi
+
 # --- Update or Create ---
 operation_status=""
 final_record_id=""
+phase_start
 
 if [ -n "$record_id" ]; then
     echo "Updating record ID: $record_id" >&2
     
     response_file=$(mktemp)
-    update_code=$(curl -s -o "$response_file" -w "%{http_code}" \
+    update_code=$(gcurl -s -o "$response_file" -w "%{http_code}" \
         -X PUT "$BASE_API_URL/records/$record_id" \
         -H "$auth_header" -H "Content-Type: application/json" \
         -d "$record_json")
@@ -124,11 +203,35 @@ if [ -n "$record_id" ]; then
 else
     echo "Creating new record..." >&2
     
+    # The key makes the POST safe to retry: the server replays the first result
+    idem_key=$(idempotency_key "$record_json")
     response_file=$(mktemp)
-    create_code=$(curl -s -o "$response_file" -w "%{http_code}" \
-        -X POST "$BASE_API_URL/records" \
-        -H "$auth_header" -H "Content-Type: application/json" \
-        -d "$record_json")
+    attempt=1
+    while :; do
+        create_code=$(gcurl -s -o "$response_file" -w "%{http_code}" \
+            --max-time 30 \
+            -X POST "$BASE_API_URL/records" \
+            -H "$auth_header" -H "Content-Type: application/json" \
+            -H "Idempotency-Key: $idem_key" \
+            -d "$record_json" || true)
+        
+        # 409: an earlier attempt with this key is still being processed
+        if [ "$create_code" = "409" ] && [ "$attempt" -lt 5 ]; then
+            echo "Create still in progress on the server, retrying ($attempt)..." >&2
+            attempt=$(( attempt + 1 ))
+            sleep 1
+            continue
+        fi
+        # 000: timed out or the connection failed. Retried here rather than with curl's
+        # --retry, which would resend 429/503s past the governor's backoff
+        if [ "$create_code" = "000" ] && [ "$attempt" -lt 4 ]; then
+            echo "Create request failed, retrying ($attempt)..." >&2
+            attempt=$(( attempt + 1 ))
+            sleep 1
+            continue
+        fi
+        break
+    done
     
     create_body=$(cat "$response_file")
     rm -f "$response_file"
@@ -149,6 +252,7 @@ else
         exit 1
     fi
 fi
+phase_end write
 
 # --- Deploy Changes ---
 deployment_status="not_deployed"
@@ -162,39 +266,17 @@ if [ "$AUTO_DEPLOY" = "true" ] || [ "$AUTO_DEPLOY" = "1" ]; then
 if [ -n "$DNS_SERVER_ID" ]; then
     # Deploy to specific server if provided
     echo "Deploying to specified DNS server ID: $DNS_SERVER_ID using v2 API..." >&2
-    
-    deploy_url="$BASE_API_URL/deployments"
-    echo "DEBUG: Deploying to URL: $deploy_url" >&2
-    
-    deploy_result=$(curl -s -w "\nHTTP_CODE:%{http_code}" \
-        -X POST "$deploy_url" \
-        -H "$auth_header" \
-        -H "Content-Type: application/json" \
-        -d "{\"service\":\"DNS\",\"serverId\":$DNS_SERVER_ID,\"entityId\":$zone_id}")
-    
-    http_code=$(echo "$deploy_result" | grep "HTTP_CODE:" | sed 's/HTTP_CODE://')
-    deploy_body=$(echo "$deploy_result" | sed '/HTTP_CODE:/d')
-    
-    echo "Deployment HTTP Code: $http_code" >&2
-    echo "Deployment Response: $deploy_body" >&2
-    
-    if [ "$http_code" = "200" ] || [ "$http_code" = "201" ] || [ "$http_code" = "204" ]; then
-        echo "✓ Successfully deployed to server $DNS_SERVER_ID" >&2
-        deployment_status="deployed"
-        deployed_servers="$DNS_SERVER_ID"
-    else
-        echo "✗ Deployment failed. HTTP Code: $http_code" >&2
-        echo "Response: $deploy_body" >&2
-    fi
+    server_ids="$DNS_SERVER_ID"
 else
     # Auto-discover deployment servers for this zone
     echo "Auto-discovering DNS servers for zone..." >&2
+    phase_start
     
     # Try multiple API endpoints for getting deployment info
     roles_url="$BASE_API_URL/zones/$zone_id/deploymentRoles"
     echo "DEBUG: Getting deployment roles from URL: $roles_url" >&2
     
-    deploy_response=$(curl -s -X GET "$roles_url" -H "$auth_header")
+    deploy_response=$(gcurl -s -X GET "$roles_url" -H "$auth_header")
     echo "DeploymentRoles response: $deploy_response" >&2
     
     # Extract all server IDs - try multiple patterns
@@ -206,7 +288,7 @@ else
         servers_url="$BASE_API_URL/servers?type=DNS"
         echo "DEBUG: Getting DNS servers from URL: $servers_url" >&2
         
-        servers_response=$(curl -s -X GET "$servers_url" -H "$auth_header")
+        servers_response=$(gcurl -s -X GET "$servers_url" -H "$auth_header")
         echo "Servers response: $servers_response" >&2
         server_ids=$(echo "$servers_response" | grep -o '"id"[[:space:]]*:[[:space:]]*[0-9]*' | sed 's/.*:\([0-9]*\)/\1/')
     fi
@@ -214,11 +296,13 @@ else
     # Alternative: Try deployment options endpoint
     if [ -z "$server_ids" ]; then
         echo "Trying alternative: Get deployment options..." >&2
-        options_response=$(curl -s -X GET "$BASE_API_URL/zones/$zone_id/deploymentOptions" -H "$auth_header")
+        options_response=$(gcurl -s -X GET "$BASE_API_URL/zones/$zone_id/deploymentOptions" -H "$auth_header")
         echo "Deployment options response: $options_response" >&2
         server_ids=$(echo "$options_response" | grep -o '"id"[[:space:]]*:[[:space:]]*[0-9]*' | sed 's/.*:\([0-9]*\)/\1/')
     fi
     
+    phase_end deploy_discovery
+    
     if [ -z "$server_ids" ]; then
         echo "⚠ Warning: No deployment servers found for zone" >&2
         echo "API Response: $deploy_response" >&2
@@ -226,40 +310,22 @@ else
         echo "Please check BlueCat documentation or specify dns_server_id manually" >&2
     else
         echo "Found servers to deploy to: $server_ids" >&2
-        
-        # Deploy to each server
-        for server_id in $server_ids; do
-            echo "Deploying to server ID: $server_id" >&2
-            
-            # Use v2 deployment endpoint
-            echo "Deploying to server $server_id using v2 API..." >&2
-            deploy_result=$(curl -s -w "\nHTTP_CODE:%{http_code}" \
-                -X POST "$BASE_API_URL/deployments" \
-                -H "$auth_header" \
-                -H "Content-Type: application/json" \
-                -d "{\"service\":\"DNS\",\"serverId\":$server_id,\"entityId\":$zone_id}")
-            
-            http_code=$(echo "$deploy_result" | grep "HTTP_CODE:" | sed 's/HTTP_CODE://')
-            deploy_body=$(echo "$deploy_result" | sed '/HTTP_CODE:/d')
-            
-            echo "Server $server_id - HTTP Code: $http_code" >&2
-            echo "Server $server_id - Response: $deploy_body" >&2
-            
-            if [ "$http_code" = "200" ] || [ "$http_code" = "201" ] || [ "$http_code" = "204" ]; then
-                echo "✓ Successfully deployed to server $server_id" >&2
-                deployment_status="deployed"
-                if [ -z "$deployed_servers" ]; then
-                    deployed_servers="$server_id"
-                else
-                    deployed_servers="$deployed_servers,$server_id"
-                fi
-            else
-                echo "✗ Deployment to server $server_id failed. HTTP Code: $http_code" >&2
-                echo "Response: $deploy_body" >&2
-            fi
-        done
     fi
 fi
+
+    # Submit a deployment to each server, then wait for all queued jobs at once
+    phase_start
+    for server_id in $server_ids; do
+        echo "Deploying to server ID: $server_id" >&2
+        submit_deployment "$server_id"
+    done
+    wait_for_deployments
+    phase_end deploy
+
+    if [ -n "$DEPLOYED_SERVERS" ]; then
+        deployment_status="deployed"
+        deployed_servers="$DEPLOYED_SERVERS"
+    fi
 else
     echo "============================================" >&2
     echo "Auto-deployment disabled - skipping deployment" >&2
@@ -271,10 +337,10 @@ echo "Deployment phase completed: $deployment_status" >&2
 echo "============================================" >&2
 
 # --- Logout ---
-curl -s -X DELETE "$BASE_API_URL/sessions/$token" -H "$auth_header" > /dev/null 2>&1
+gcurl -s -X DELETE "$BASE_API_URL/sessions/$token" -H "$auth_header" > /dev/null 2>&1
 echo "Completed successfully" >&2
 
 # Output JSON result to stdout for Terraform to capture (no jq needed)
 # This is the ONLY output to stdout - everything else goes to stderr
-printf '{"record_id":"%s","operation_status":"%s","fqdn":"%s","zone_id":"%s","deployment_status":"%s","deployed_servers":"%s"}\n' \
-    "$final_record_id" "$operation_status" "$FQDN" "$zone_id" "$deployment_status" "$deployed_servers"
+printf '{"record_id":"%s","operation_status":"%s","fqdn":"%s","zone":"%s","record_name":"%s","zone_id":"%s","deployment_status":"%s","deployed_servers":"%s"%s}\n' \
+    "$final_record_id" "$operation_status" "$FQDN" "$ZONE" "$RECORD_NAME" "$zone_id" "$deployment_status" "$deployed_servers" "$(timing_json)"
@@ -4,7 +4,7 @@ output "record_id" {
 }
 
 output "operation_status" {
-  description = "Whether the record was created or updated"
+  description = "Whether the record was created or updated; in read-only mode the predicted would_create, would_update or unchanged"
   value       = local.operation_status
 }
 
@@ -41,4 +41,14 @@ output "record_details" {
     deployment_status = local.deployment_status
     deployed_servers  = local.deployed_servers
   }
-}
\ No newline at end of file
+}
+
+output "timings" {
+  description = "Milliseconds spent in each phase of the last run: auth, zone_lookup, record_lookup, write, deploy_discovery, deploy and total"
+  value       = local.timings
+}
+
+output "deploy_server_timings" {
+  description = "Milliseconds from submitting each server's deployment to its final status, keyed by server ID"
+  value       = local.deploy_server_timings
+}
@@ -16,8 +16,9 @@ variable "password" {
 }
 
 variable "zone" {
-  description = "DNS zone name"
+  description = "DNS zone name (leave empty to resolve it from fqdn)"
   type        = string
+  default     = ""
 }
 
 variable "record_type" {
@@ -31,8 +32,21 @@ variable "record_type" {
 }
 
 variable "record_name" {
-  description = "DNS record name (without zone)"
+  description = "DNS record name (without zone; leave empty when using fqdn)"
+  type        = string
+  default     = ""
+}
+
+variable "fqdn" {
+  description = "Full record name; used with zone and record_name empty to find the most specific enclosing zone"
   type        = string
+  default     = ""
+}
+
+variable "view" {
+  description = "DNS view the zone belongs to (empty matches any view)"
+  type        = string
+  default     = ""
 }
 
 variable "record_value" {
@@ -68,4 +82,40 @@ variable "auto_deploy" {
   description = "Whether to automatically deploy DNS changes to servers after record creation/deletion"
   type        = bool
   default     = true
-}
\ No newline at end of file
+}
+
+variable "differential_threshold" {
+  description = "Use a DifferentialDeployment when a zone has at most this many undeployed record changes; larger change sets (or 0) use a FullDeployment. Needs the pending-change count only the mock server reports; destroy uses the BLUECAT_DIFFERENTIAL_THRESHOLD environment variable"
+  type        = number
+  default     = 50
+}
+
+variable "deploy_timeout" {
+  description = "Seconds to wait for queued deployment jobs to finish before reporting them as failed (destroy uses the BLUECAT_DEPLOY_TIMEOUT environment variable)"
+  type        = number
+  default     = 600
+}
+
+variable "trace_file" {
+  description = "Optional file to append per-phase timings to as JSON lines (destroy uses the BLUECAT_TRACE_FILE environment variable)"
+  type        = string
+  default     = ""
+}
+
+variable "max_in_flight" {
+  description = "Most API requests all record scripts of a run may have in flight at once; lowered automatically when the appliance answers 429/503. 0 disables the governor (destroy uses the BLUECAT_MAX_IN_FLIGHT environment variable)"
+  type        = number
+  default     = 10
+}
+
+variable "requests_per_second" {
+  description = "Most API requests per second across all record scripts of a run; 0 means no limit (destroy uses the BLUECAT_REQUESTS_PER_SECOND environment variable)"
+  type        = number
+  default     = 0
+}
+
+variable "read_only" {
+  description = "Only look the record up during plan and report the predicted operation_status (would_create, would_update or unchanged); the write and deployment run at apply time"
+  type        = bool
+  default     = false
+}
@@ -41,36 +41,76 @@ if ! command -v terraform &> /dev/null; then
     exit 1
 fi
 
-print_status "INFO" "Starting BlueCat mock server..."
+# Mock server location. A warm server that is already running is reused;
+# each run gets its own tenant namespace so parallel runs don't share data.
+MOCK_PORT="${MOCK_PORT:-5001}"
+MOCK_URL="${MOCK_URL:-http://localhost:$MOCK_PORT}"
+TENANT="${MOCK_TENANT:-ci-$$-$(date +%s)}"
+SERVER_PID=""
+
+if curl -s "$MOCK_URL/health" > /dev/null; then
+    print_status "INFO" "Reusing running mock server at $MOCK_URL"
+else
+    print_status "INFO" "Starting BlueCat mock server..."
 
-# Start mock server in background
-cd mock-server
-python3 -m pip install -r requirements.txt --quiet
-python3 server.py &
-SERVER_PID=$!
-cd ..
+    # Start mock server in background
+    cd mock-server
+    python3 -m pip install -r requirements.txt --quiet
+    python3 server.py --port "$MOCK_PORT" &
+    SERVER_PID=$!
+    cd ..
 
-# Wait for server to start
-sleep 3
+    # Wait for server to start
+    for _ in $(seq 1 50); do
+        curl -s "$MOCK_URL/health" > /dev/null && break
+        sleep 0.2
+    done
+
+    # Check if server is running. A run started at the same moment may have won
+    # the port; our server then exited and that run's server is shared instead
+    if curl -s "$MOCK_URL/health" > /dev/null && ! kill -0 $SERVER_PID 2>/dev/null; then
+        print_status "INFO" "Port $MOCK_PORT taken by another run's mock server, reusing it"
+        SERVER_PID=""
+    elif curl -s "$MOCK_URL/health" > /dev/null; then
+        print_status "SUCCESS" "Mock server started successfully (PID: $SERVER_PID)"
+    else
+        print_status "ERROR" "Failed to start mock server"
+        kill $SERVER_PID 2>/dev/null || true
+        exit 1
+    fi
+fi
 
-# Check if server is running
-if curl -s http://localhost:5000/health > /dev/null; then
-    print_status "SUCCESS" "Mock server started successfully (PID: $SERVER_PID)"
-else
-    print_status "ERROR" "Failed to start mock server"
-    kill $SERVER_PID 2>/dev/null || true
+# Create an isolated tenant for this run
+tenant_code=$(curl -s -o /dev/null -w "%{http_code}" -X POST "$MOCK_URL/admin/tenants" \
+    -H "Content-Type: application/json" -d "{\"name\":\"$TENANT\"}")
+if [ "$tenant_code" != "201" ]; then
+    print_status "ERROR" "Failed to create mock tenant $TENANT (HTTP $tenant_code)"
+    [ -n "$SERVER_PID" ] && kill $SERVER_PID 2>/dev/null
     exit 1
 fi
+API_URL="$MOCK_URL/tenants/$TENANT"
+print_status "SUCCESS" "Using mock tenant $TENANT"
 
 # Function to cleanup
 cleanup() {
     print_status "INFO" "Cleaning up..."
-    kill $SERVER_PID 2>/dev/null || true
     cd examples
     terraform destroy -auto-approve -var-file=test.tfvars 2>/dev/null || true
     rm -f terraform.tfstate terraform.tfstate.backup .terraform.lock.hcl
     rm -rf .terraform/
     cd ..
+    curl -s -X DELETE "$MOCK_URL/admin/tenants/$TENANT" > /dev/null || true
+    if [ -n "$SERVER_PID" ]; then
+        # Runs that reused this server may still be going; leave it to them
+        others=$(curl -s "$MOCK_URL/admin/tenants" | python3 -c \
+            'import json, sys; print(sum(1 for t in json.load(sys.stdin) if t["name"] != "default"))' \
+            2>/dev/null || echo 0)
+        if [ "$others" -gt 0 ]; then
+            print_status "INFO" "Leaving mock server $SERVER_PID running for $others other tenant(s)"
+        else
+            kill $SERVER_PID 2>/dev/null || true
+        fi
+    fi
 }
 
 # Set trap to cleanup on exit
@@ -83,7 +123,7 @@ cd examples
 cat > test.tfvars << EOF
 # Test variables for mock server
 # These are safe to commit as they're only for the mock server
-api_url = "http://localhost:5000"
+api_url = "$API_URL"
 username = "testuser"
 password = "testpass"
 EOF
@@ -113,7 +153,7 @@ terraform output test_results
 print_status "INFO" "Verifying records in mock server..."
 echo ""
 echo "Mock server records:"
-curl -s http://localhost:5000/debug/records | python3 -m json.tool
+curl -s "$API_URL/debug/records" | python3 -m json.tool
 
 print_status "INFO" "Testing update operation..."
 # Modify a record and apply again
@@ -134,7 +174,7 @@ fi
 print_status "INFO" "Verifying cleanup..."
 echo ""
 echo "Mock server records after destroy:"
-curl -s http://localhost:5000/debug/records | python3 -m json.tool
+curl -s "$API_URL/debug/records" | python3 -m json.tool
 
 cd ..
 
@@ -0,0 +1,83 @@
+"""
+manage_record.sh against a mock server started for the test run.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+import unittest
+import urllib.request
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MOCK_SERVER = os.path.join(ROOT, 'mock-server', 'server.py')
+MANAGE_RECORD = os.path.join(ROOT, 'terraform-bluecat', 'manage_record.sh')
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class ManageRecordTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        port = free_port()
+        cls.url = f"http://127.0.0.1:{port}"
+        cls.server = subprocess.Popen([sys.executable, MOCK_SERVER, '--host', '127.0.0.1', '--port', str(port)],
+                                      stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f"{cls.url}/health", timeout=1).close()
+                return
+            except OSError:
+                time.sleep(0.1)
+        cls.server.kill()
+        raise RuntimeError("mock server did not start")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.terminate()
+        cls.server.wait()
+
+    def manage(self, **fields):
+        query = {"api_url": self.url, "username": "admin", "password": "admin", "api_version": "v2",
+                 "ttl": "300", "auto_deploy": "false", "max_in_flight": "0"}
+        query.update(fields)
+        result = subprocess.run(['bash', MANAGE_RECORD], input=json.dumps(query, separators=(',', ':')),
+                                capture_output=True, text=True, timeout=60)
+        self.assertEqual(result.returncode, 0, result.stderr)
+        return json.loads(result.stdout)
+
+    def zone_records(self, zone_id):
+        with urllib.request.urlopen(f"{self.url}/debug/records") as response:
+            stored = json.load(response)['records']
+        return [r for r in stored.values() if str(r['parentId']) == zone_id]
+
+    def test_view_scoped_zone_second_run_finds_the_record(self):
+        # "queue.core.windows.net" exists in two views; the external one is stored under a suffixed key
+        record = {"fqdn": "svc.queue.core.windows.net", "view": "external", "record_type": "A",
+                  "record_value": "10.20.30.40"}
+
+        first = self.manage(**record)
+        self.assertEqual(first['operation_status'], 'created')
+        self.assertEqual(first['zone_id'], '100004')
+
+        predicted = self.manage(read_only="true", **record)
+        self.assertEqual(predicted['operation_status'], 'unchanged')
+        self.assertEqual(predicted['record_id'], first['record_id'])
+
+        second = self.manage(**record)
+        self.assertEqual(second['operation_status'], 'updated')
+        self.assertEqual(second['record_id'], first['record_id'])
+        self.assertEqual(len(self.zone_records('100004')), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,43 @@
+"""
+Zone-file parser checks.
+
+Run from the repository root: python -m pytest tests
+"""
+
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'mock-server'))
+
+from zonefile import ZoneFileError, _is_ttl, _parse_ttl, parse_zone_file  # noqa: E402
+
+
+class TtlTest(unittest.TestCase):
+
+    def test_ttl_forms(self):
+        self.assertEqual(_parse_ttl('3600', 1), 3600)
+        self.assertEqual(_parse_ttl('1h30m', 1), 5400)
+        self.assertEqual(_parse_ttl('1W', 1), 604800)
+        for token in ('IN', 'h1', '1hx', ''):
+            self.assertFalse(_is_ttl(token), token)
+        with self.assertRaises(ZoneFileError):
+            _parse_ttl('30x', 1)
+
+    def test_long_digit_run_is_rejected_quickly(self):
+        # Every token of an uploaded file goes through _is_ttl; the old pattern
+        # backtracked exponentially on a digit run followed by a non-unit (~10s here)
+        started = time.perf_counter()
+        self.assertFalse(_is_ttl('1' * 26 + 'x'))
+        self.assertFalse(_is_ttl('1' * 5000 + 'x'))
+        self.assertLess(time.perf_counter() - started, 1.0)
+
+    def test_long_digit_owner_name_parses(self):
+        lines = ['$ORIGIN example.com.\n', '1' * 64 + 'x 300 IN A 192.0.2.1\n']
+        records = list(parse_zone_file(lines, 'example.com'))
+        self.assertEqual(records[0]['name'], '1' * 64 + 'x')
+
+
+if __name__ == '__main__':
+    unittest.main()